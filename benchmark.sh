@@ -0,0 +1,11 @@
+# Run the benchmark suite and save the results to .benchmarks
+# Results are saved with the current package version so releases can be compared.
+# Extra arguments are passed to pytest e.g.
+# ./benchmark.sh --benchmark-compare --benchmark-compare-fail=mean:10%
+VERSION=$(python -c "from data_helpers.version import VERSION; print(VERSION)")
+python -m pytest tests/benchmarks/*_bench.py \
+    --benchmark-only \
+    --benchmark-storage=.benchmarks \
+    --benchmark-save="v${VERSION}" \
+    --benchmark-group-by=group,param \
+    "$@"
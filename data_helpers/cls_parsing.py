@@ -1,29 +1,169 @@
 import enum
 from warnings import warn
 from inspect import get_annotations
-from dataclasses import asdict, is_dataclass, replace
-from typing import Any, Callable, NamedTuple, List, Union, TypeVar, get_args
+from dataclasses import MISSING, fields, is_dataclass, replace
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    FrozenSet,
+    NamedTuple,
+    List,
+    Optional,
+    Tuple,
+    Union,
+    TypeVar,
+    get_args,
+)
 from copy import deepcopy
-from functools import reduce
+from functools import lru_cache, reduce
+from itertools import islice
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import numpy as np
 from data_helpers.comparisons import (
-    is_dictionary,
     is_enum,
     is_base_cls,
-    is_iterable,
     is_named_tuple,
     is_optional,
     is_union,
     is_field_class,
+    get_type_kind,
 )
 
 from data_helpers.dictionary_helpers import get_nested_val
 from data_helpers.comparisons import isNamedTuple
+from data_helpers.traversal import fold
+
+
+T = TypeVar("T")
+
+PATH_CACHE_SIZE = 1024
+
+
+def _to_index(key: str) -> Optional[int]:
+    try:
+        return int(key)
+    except ValueError:
+        return None
+
+
+def _get_path_keys(obj, keys: Tuple[Tuple[str, Optional[int]], ...], args: tuple):
+    for key, index in keys:
+        obj_type = type(obj)
+        if obj_type is dict:
+            obj = obj.get(key, None)
+        elif isinstance(obj, list) or obj_type.__module__ == "numpy":
+            obj = obj[int(key) if index is None else index]
+        elif isinstance(obj, dict):
+            obj = obj.get(key, None)
+        else:
+            obj = getattr(obj, key, *args)
+    return obj
+
+
+def _set_container_val(target, key: str, index: Optional[int], val: Any, pre: str) -> None:
+    """Set key in the target container. pre is the path to target used for errors."""
+    if isinstance(target, list):
+        index = int(key) if index is None else index
+        if len(target) - 1 < index:
+            for _ in range(len(target) - 1, index):
+                target.append(None)
+        target[index] = val
+    elif isinstance(target, dict):
+        target[key] = val
+    elif is_dataclass(target):
+        setattr(target, key, val)
+    elif target is None:
+        raise ValueError(f"{pre} is None")
+    else:
+        raise ValueError(f"Unrecognised Type {pre} - {target}")
+
+
+class CompiledPath:
+    """A dot notation path that is split and parsed once.
+
+    Has the same get, set and delete behaviour as `rgetattr`, `rsetattr` and `rdelattr`.
+    Use `compile_path` to get a cached instance.
+
+    Example
+    -------
+    ```
+    path = compile_path("a.b.3.c")
+    path.get(obj)
+    path.set(obj, 1)
+    path.delete(obj)
+    ```
+    """
+
+    __slots__ = ("path", "keys", "_prefix_path", "_prefix_keys", "_last_key", "_last_index")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = tuple((k, _to_index(k)) for k in path.split("."))
+        self._prefix_path = path.rpartition(".")[0]
+        self._prefix_keys = self.keys[:-1]
+        self._last_key, self._last_index = self.keys[-1]
+
+    def __repr__(self):
+        return f"CompiledPath({self.path!r})"
+
+    def get(self, obj, *args):
+        """Get the value at this path. Optional args are the getattr default."""
+        return _get_path_keys(obj, self.keys, args)
+
+    def get_parent(self, obj):
+        """Get the container that holds the last key of this path."""
+        return _get_path_keys(obj, self._prefix_keys, ()) if self._prefix_keys else obj
+
+    def set(self, obj: T, val: Any, create_missing_dicts: bool = False) -> T:
+        """Set the value at this path in place and return obj."""
+        pre, post = self._prefix_path, self._last_key
+        try:
+            target = self.get_parent(obj)
+            if target is None:
+                raise AttributeError(f"{pre} not found")
+        except AttributeError as e:
+            if create_missing_dicts:
+                new_dict = {} if not post.isnumeric() else []
+                compile_path(pre).set(obj, new_dict, True)
+                target = self.get_parent(obj)
+            else:
+                print(f"Missing attribute for {pre}")
+                raise e
+        _set_container_val(target, post, self._last_index, val, pre)
+        return obj
+
+    def delete(self, obj: T) -> T:
+        """Delete the value at this path in place and return obj."""
+        target = self.get_parent(obj)
+        post = self._last_key
+        if isinstance(target, list):
+            del target[int(post) if self._last_index is None else self._last_index]
+        elif isinstance(target, dict):
+            if post in target:
+                del target[post]
+        elif target is None:
+            return obj
+        else:
+            setattr(target, post, None)
+        return obj
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(path: str) -> CompiledPath:
+    """Get a cached `CompiledPath` for a dot notation path."""
+    return CompiledPath(path)
 
 
 def rgetattr(obj: object, attr: Union[str, List[str]], *args):
     """Get nested properties with dot notation or list of string path.
 
+    String paths are compiled once and cached, see `compile_path`.
+
     https://stackoverflow.com/questions/31174295/getattr-and-setattr-on-nested-subobjects-chained-properties
 
     Properties
@@ -31,6 +171,8 @@ def rgetattr(obj: object, attr: Union[str, List[str]], *args):
     obj: object  [description]
     attr: OneOf[str, List[str]]  Either a dot notation string or list of strings
     """
+    if isinstance(attr, str):
+        return compile_path(attr).get(obj, *args)
 
     def _getattr(obj, attr):
         return (
@@ -49,9 +191,6 @@ def rgetattr(obj: object, attr: Union[str, List[str]], *args):
     return reduce(_getattr, [obj] + attr_list)
 
 
-T = TypeVar("T")
-
-
 def rsetattr(
     obj: T,
     attr: Union[str, List[str]],
@@ -60,6 +199,8 @@ def rsetattr(
 ) -> T:
     """Set nested attributes with dot string path or string list
 
+    String paths are compiled once and cached, see `compile_path`.
+
     https://stackoverflow.com/questions/31174295/getattr-and-setattr-on-nested-subobjects-chained-properties
 
     Properties
@@ -68,6 +209,8 @@ def rsetattr(
     attr: OneOf[str, List[str]]  Either a dot notation string or list of strings
     val: any
     """
+    if isinstance(attr, str):
+        return compile_path(attr).set(obj, val, create_missing_dicts)
     # obj_copy = deepcopy(obj) # deep copy takes 10 times as long!
     obj_copy = obj
     # pre - path to current location
@@ -109,6 +252,83 @@ def rsetattr(
     return obj_copy
 
 
+class _PathTrieNode:
+    __slots__ = ("children", "has_value", "value")
+
+    def __init__(self):
+        self.children: Dict[str, "_PathTrieNode"] = {}
+        self.has_value = False
+        self.value = None
+
+
+def _build_path_trie(values: Dict[str, Any]) -> _PathTrieNode:
+    root = _PathTrieNode()
+    for path, val in values.items():
+        node = root
+        for k in path.split("."):
+            node = node.children.setdefault(k, _PathTrieNode())
+        node.has_value = True
+        node.value = val
+    return root
+
+
+def _apply_path_trie(
+    target, trie: _PathTrieNode, pre: str, create_missing_dicts: bool, is_new=False
+) -> None:
+    """Set the values of trie in target. is_new is True if target was created here."""
+    for key, node in trie.children.items():
+        path = f"{pre}.{key}" if pre else key
+        index = _to_index(key)
+        if node.has_value:
+            _set_container_val(target, key, index, node.value, pre)
+        if not node.children:
+            continue
+        child_is_new = False
+        try:
+            try:
+                child = _get_path_keys(target, ((key, index),), ())
+            except IndexError:
+                # Items past the end of a created list are missing as in rsetattr
+                if not is_new:
+                    raise
+                child = None
+            if child is None:
+                raise AttributeError(f"{path} not found")
+        except AttributeError as e:
+            if create_missing_dicts:
+                first_key = next(iter(node.children))
+                child = {} if not first_key.isnumeric() else []
+                _set_container_val(target, key, index, child, pre)
+                child_is_new = True
+            else:
+                print(f"Missing attribute for {path}")
+                raise e
+        _apply_path_trie(child, node, path, create_missing_dicts, child_is_new)
+
+
+def rsetattr_many(obj: T, values: Dict[str, Any], create_missing_dicts: bool = False) -> T:
+    """Set many nested attributes from a dictionary of dot string paths to values.
+
+    Paths are grouped into a prefix tree so that each shared prefix is only traversed once.
+    Has the same behaviour as calling `rsetattr` for each path except that if both a path
+    and one of its prefixes are set the prefix is always set first, and a list created
+    for one path is padded for the other paths that share it.
+
+    e.g.
+    ```
+    rsetattr_many(obj, {"a.b.c": 1, "a.b.d": 2, "x.0": 3})
+    ```
+
+    Properties
+    ----------
+    obj: object  [description]
+    values: Dict[str, any]  Dot notation paths mapped to the values to set
+    create_missing_dicts: bool  Create missing dicts and lists along the paths
+    """
+    _apply_path_trie(obj, _build_path_trie(values), "", create_missing_dicts)
+    return obj
+
+
 def rdelattr(obj: object, attr: Union[str, List[str]]):
     """delete nested attributes with dot string path or string list
 
@@ -117,6 +337,8 @@ def rdelattr(obj: object, attr: Union[str, List[str]]):
     obj: object  [description]
     attr: OneOf[str, List[str]]  Either a dot notation string or list of strings
     """
+    if isinstance(attr, str):
+        return compile_path(attr).delete(obj)
     # obj_copy = deepcopy(obj) # deep copy takes 10 times as long!
     obj_copy = obj
     pre, _, post = (
@@ -173,20 +395,21 @@ def parse_list_val(f, t, v, strict=False):
         if type(item_type) is TypeVar:
             # Type is a custom type so we should just return the value
             return v
-        if is_base_cls(item_type):
+        item_kind = get_type_kind(item_type)
+        if item_kind.is_base:
             return v
         # TODO: Can we just pass this back to parse value?
-        if is_iterable(item_type):
+        if item_kind.is_iterable:
             if v is None:
                 return []
             return [parse_list_val(f, item_type, vi) for vi in v]
-        if is_field_class(item_type):
+        if item_kind.is_field_class:
             fn = get_parser(item_type.type)
             return [fn(f, item_type.type, vi, strict) for vi in v]
             # TODO: Handle field class
-        if is_dataclass(item_type):
+        if item_kind.is_dataclass:
             return [dict_to_cls(vi, item_type, strict) or item_type() for vi in v]  # type: ignore
-        if is_named_tuple(item_type):
+        if item_kind.is_named_tuple:
             return [dict_to_cls(vi, item_type, strict) or item_type() for vi in v]
     except AttributeError as e:
         warn(f"Invalid type: {t}, {f}: {v}")
@@ -296,13 +519,14 @@ def get_parser(t) -> Callable[[str, type | Union[Any, None], Any, bool], object]
         Raised if the supplied type has not been implemented
     """
 
-    if is_base_cls(t):
+    kind = get_type_kind(t)
+    if kind.is_base:
         return parse_base_val
-    if is_iterable(t):
+    if kind.is_iterable:
         return parse_list_val
-    if is_optional(t):
+    if kind.is_optional:
         return get_parser_for_optional(t)
-    if is_union(t):
+    if kind.is_union:
         if isinstance(get_args(t)[1], type(None)) or get_args(t)[1] is type(None):
             # Assume optional
             return get_parser(get_args(t)[0])
@@ -311,56 +535,128 @@ def get_parser(t) -> Callable[[str, type | Union[Any, None], Any, bool], object]
                 "Invalid Union Type: Can only parse Unions of base classes but got ", get_args(t)
             )
         return get_parser(get_args(t)[0])
-    if is_field_class(t):
+    if kind.is_field_class:
         return get_parser(t.type)
-    if is_dataclass(t):
+    if kind.is_dataclass:
         return parse_dataclass_val
-    if is_dictionary(t):
+    if kind.is_dictionary:
         return parse_dataclass_val
-    if is_enum(t):
+    if kind.is_enum:
         return parse_enum_val
-    if is_named_tuple(t):
+    if kind.is_named_tuple:
         return parse_named_tuple_val
 
     raise TypeError("{} is invalid type".format(t))
 
 
-def dict_to_cls(data: dict, Cls, strict=False):
-    """Parses a nested dictionary to a specific class using class attributes"""
+class FieldParsePlan(NamedTuple):
+    """Resolved parsing information for a single class field."""
+
+    name: str
+    type: Any
+    parse_type: Any
+    parser: Optional[Callable[[str, Any, Any, bool], object]]
+
+
+class ParsePlan(NamedTuple):
+    """Resolved field names, types and parsers for a target class.
+
+    Built once per class by `get_parse_plan` so that `dict_to_cls` only has to
+    convert values on later calls.
+    """
+
+    cls: Any
+    fields: Tuple[FieldParsePlan, ...]
+    field_names: FrozenSet[str]
+
+
+_PARSE_PLAN_CACHE: Dict[Any, ParsePlan] = {}
+
+
+def compile_parse_plan(Cls) -> ParsePlan:
+    """Resolve the fields, types and parsers of Cls without using the cache.
+
+    Fields whose type has no parser are stored with `parser=None` so that the error is
+    only raised when a record actually contains that field.
+    """
+    field_plans = []
+    for f, t in get_annotations(Cls).items():
+        tt = t.type if is_field_class(t) else t
+        try:
+            parser = get_parser(t)
+        except Exception:
+            parser = None
+        field_plans.append(FieldParsePlan(f, t, tt, parser))
+    return ParsePlan(Cls, tuple(field_plans), frozenset(fp.name for fp in field_plans))
+
+
+def get_parse_plan(Cls) -> ParsePlan:
+    """Get the cached parse plan for Cls, compiling it on first use."""
+    try:
+        return _PARSE_PLAN_CACHE[Cls]
+    except KeyError:
+        plan = compile_parse_plan(Cls)
+        _PARSE_PLAN_CACHE[Cls] = plan
+        return plan
+    except TypeError:
+        # Unhashable target types cannot be cached
+        return compile_parse_plan(Cls)
+
+
+def warm_parse_plan_cache(*classes) -> None:
+    """Compile and cache parse plans for the supplied classes ahead of parsing."""
+    for Cls in classes:
+        get_parse_plan(Cls)
+
+
+def clear_parse_plan_cache(Cls=None) -> None:
+    """Invalidate the cached parse plan and compiled parser for Cls or all if Cls is None.
+
+    Call this if the annotations of a class are modified after it has been parsed.
+    """
+    if Cls is None:
+        _PARSE_PLAN_CACHE.clear()
+        _COMPILED_PARSER_CACHE.clear()
+    else:
+        _PARSE_PLAN_CACHE.pop(Cls, None)
+        _COMPILED_PARSER_CACHE.pop(Cls, None)
+
+
+def _report_construct_error(Cls, e: TypeError) -> None:
+    if "missing" in str(e):
+        # We are missing required inputs to this class
+        print("Missing required inputs to class", Cls.__name__)
+    elif "object is not callable" in str(e):
+        # Class is not callable
+        print("Class is not callable", Cls)
+
+
+def _dict_to_cls_with_plan(data: dict, Cls, plan: ParsePlan, strict=False):
     if not isinstance(data, dict):
         if data is None:
             return None
         raise Exception("Data is invalid {}".format(type(data)))
 
-    cls_fields = [f for (f, t) in get_annotations(Cls).items() if f in data]
-    # cls_fields = [f for (f, t) in Cls.__annotations__.items() if f in data]
     # if strict ensure that no invalid data fields
     if strict:
-        invalid_data_keys = [k for k in data.keys() if k not in cls_fields]
+        invalid_data_keys = [k for k in data.keys() if k not in plan.field_names]
         if len(invalid_data_keys) > 0:
             first_invalid_key = invalid_data_keys[0]
             raise Exception("{} must be in {} fields".format(first_invalid_key, Cls.__name__))
 
-    cls_field_types = [t for (f, t) in get_annotations(Cls).items() if f in data]
-    # cls_field_types = [t for (f, t) in Cls.__annotations__.items() if f in data]
-    data_values = [data[f] for f in cls_fields]
-
     new_data = {}
     # f = field; t = type; v = value
-    for f, t, v in zip(cls_fields, cls_field_types, data_values):
+    for f, t, tt, parser in plan.fields:
+        if f not in data:
+            continue
         # TODO: If t is string then we need to import the type
-
-        is_meta_type = is_field_class(t)
-        tt = t
-        if is_meta_type:
-            tt = t.type
-
-        try:
-            parser = get_parser(t)
-        except Exception as e:
-            print(f"Error getting parser for field {f} of type {t} in class {Cls.__name__}")
-            raise e
-        d = parser(f, tt, v, strict)
+        if parser is None:
+            try:
+                parser = get_parser(t)
+            except Exception as e:
+                print(f"Error getting parser for field {f} of type {t} in class {Cls.__name__}")
+                raise e
+        d = parser(f, tt, data[f], strict)
         new_data[f] = d
     try:
         if is_optional(Cls):
@@ -370,19 +666,339 @@ def dict_to_cls(data: dict, Cls, strict=False):
                 Cls = get_args(Cls)[0]
         cls_out = Cls(**new_data)
     except TypeError as e:
-        if "missing" in str(e):
-            # We are missing required inputs to this class
-            print("Missing required inputs to class", Cls.__name__)
-            raise e
-        if "object is not callable" in str(e):
-            # Class is not callable
-            print("Class is not callable", Cls)
-            raise e
-        else:
-            raise e
+        _report_construct_error(Cls, e)
+        raise e
     return cls_out
 
 
+_COMPILED_PARSER_CACHE: Dict[Any, Callable[[dict, bool], Any]] = {}
+
+
+def _is_record_cls(t) -> bool:
+    return isinstance(t, type) and (is_dataclass(t) or is_named_tuple(t))
+
+
+def _field_parser_src(i: int, field_plan: FieldParsePlan) -> List[str]:
+    """Generate the source lines that parse the local `v` for a single field.
+
+    Base types, nested records and lists of nested records are inlined. Any other field
+    falls back to calling its resolved parser.
+    """
+    f, t, tt, parser = field_plan
+    generic = [f"        kwargs[{f!r}] = _p{i}({f!r}, _t{i}, v, strict)"]
+    if parser is parse_base_val and is_base_cls(tt):
+        # Values that already have the correct type do not need converting
+        return [
+            f"        if v is None or type(v) is _t{i}:",
+            f"            kwargs[{f!r}] = v",
+            "        else:",
+            "    " + generic[0],
+        ]
+    nested_cls = get_optional_arg(tt) if is_optional(tt) else tt
+    if parser in (parse_dataclass_val, parse_named_tuple_val) or is_optional(tt):
+        if not _is_record_cls(nested_cls):
+            return generic
+        record_check = ["        if type(v) is dict and v:"]
+        if is_optional(tt):
+            record_check = [
+                "        if v is None:",
+                f"            kwargs[{f!r}] = None",
+                "        elif type(v) is dict and v:",
+            ]
+        return record_check + [
+            f"            kwargs[{f!r}] = _compiled(_n{i})(v, strict) or _n{i}()",
+            "        else:",
+            "    " + generic[0],
+        ]
+    if parser is parse_list_val:
+        item_type = getattr(tt, "__args__", (None,))[0]
+        if not _is_record_cls(item_type):
+            return generic
+        return [
+            "        if type(v) is list:",
+            f"            _c = _compiled(_n{i})",
+            f"            kwargs[{f!r}] = [_c(vi, strict) or _n{i}() for vi in v]",
+            "        else:",
+            "    " + generic[0],
+        ]
+    return generic
+
+
+def _nested_cls(field_plan: FieldParsePlan):
+    tt = field_plan.parse_type
+    if field_plan.parser is parse_list_val:
+        return getattr(tt, "__args__", (None,))[0]
+    return get_optional_arg(tt)
+
+
+def compile_parser(Cls) -> Callable[[dict, bool], Any]:
+    """Generate and compile a parser function specialised to Cls.
+
+    The generated function has straight line field access, conversion and constructor
+    calls, similar to how `dataclasses` creates `__init__`. Nested dataclass and
+    NamedTuple fields call their own compiled parsers.
+    Classes that cannot be compiled fall back to the cached parse plan.
+
+    Returns
+    -------
+    Callable[[dict, bool], Any]
+        A function with the signature `fn(data, strict=False)`
+    """
+    plan = get_parse_plan(Cls)
+    if not _is_record_cls(Cls) or any(fp.parser is None for fp in plan.fields):
+
+        def fallback_parser(data, strict=False):
+            if data is None:
+                return None
+            return _dict_to_cls_with_plan(data, Cls, plan, strict)
+
+        return fallback_parser
+
+    namespace: Dict[str, Any] = {
+        "_cls": Cls,
+        "_field_names": plan.field_names,
+        "_dict_to_cls": dict_to_cls,
+        "_compiled": get_compiled_parser,
+        "_report_construct_error": _report_construct_error,
+    }
+    body = [
+        "    if type(data) is not dict:",
+        "        return _dict_to_cls(data, _cls, strict)",
+        "    if strict:",
+        "        for k in data:",
+        "            if k not in _field_names:",
+        '                raise Exception(f"{k} must be in {_cls.__name__} fields")',
+        "    kwargs = {}",
+    ]
+    for i, field_plan in enumerate(plan.fields):
+        namespace[f"_p{i}"] = field_plan.parser
+        namespace[f"_t{i}"] = field_plan.parse_type
+        namespace[f"_n{i}"] = _nested_cls(field_plan)
+        body += [f"    if {field_plan.name!r} in data:", f"        v = data[{field_plan.name!r}]"]
+        body += _field_parser_src(i, field_plan)
+    body += [
+        "    try:",
+        "        return _cls(**kwargs)",
+        "    except TypeError as e:",
+        "        _report_construct_error(_cls, e)",
+        "        raise e",
+    ]
+    # Class names do not have to be identifiers so only name the function afterwards
+    src = "def _dict_to_cls_compiled(data, strict=False):\n" + "\n".join(body)
+    exec(src, namespace)
+    fn = namespace["_dict_to_cls_compiled"]
+    fn.__name__ = fn.__qualname__ = f"__dict_to_{Cls.__name__}"
+    return fn
+
+
+def get_compiled_parser(Cls) -> Callable[[dict, bool], Any]:
+    """Get the cached compiled parser for Cls, generating it on first use."""
+    try:
+        return _COMPILED_PARSER_CACHE[Cls]
+    except KeyError:
+        fn = compile_parser(Cls)
+        _COMPILED_PARSER_CACHE[Cls] = fn
+        return fn
+    except TypeError:
+        # Unhashable target types cannot be cached
+        return compile_parser(Cls)
+
+
+def dict_to_cls(data: dict, Cls, strict=False, compiled=False):
+    """Parses a nested dictionary to a specific class using class attributes
+
+    Field parsers are resolved once per class and cached, see `get_parse_plan`.
+    If compiled is True a parser function generated specifically for Cls is used instead,
+    see `compile_parser`.
+    """
+    if compiled:
+        return get_compiled_parser(Cls)(data, strict)
+    if not isinstance(data, dict):
+        if data is None:
+            return None
+        raise Exception("Data is invalid {}".format(type(data)))
+    return _dict_to_cls_with_plan(data, Cls, get_parse_plan(Cls), strict)
+
+
+def _dict_to_cls_chunk(data: List[dict], Cls, strict=False, compiled=False) -> list:
+    if compiled:
+        parser = get_compiled_parser(Cls)
+        return [parser(d, strict) for d in data]
+    plan = get_parse_plan(Cls)
+    return [_dict_to_cls_with_plan(d, Cls, plan, strict) for d in data]
+
+
+def _iter_chunks(data: Iterable[dict], chunk_size: int) -> Iterator[List[dict]]:
+    data_iter = iter(data)
+    while chunk := list(islice(data_iter, chunk_size)):
+        yield chunk
+
+
+def _iter_dict_to_cls_many(data: Iterable[dict], Cls, strict, workers, chunk_size, compiled):
+    if not workers or workers <= 1:
+        if compiled:
+            parser = get_compiled_parser(Cls)
+            for d in data:
+                yield parser(d, strict)
+            return
+        plan = get_parse_plan(Cls)
+        for d in data:
+            yield _dict_to_cls_with_plan(d, Cls, plan, strict)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Executor.map would read all of data up front so keep a bounded window of
+        # chunks in flight and yield them in order
+        pending: Deque[Future] = deque()
+        for chunk in _iter_chunks(data, chunk_size):
+            pending.append(executor.submit(_dict_to_cls_chunk, chunk, Cls, strict, compiled))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def dict_to_cls_many(
+    data: Iterable[dict],
+    Cls,
+    strict=False,
+    workers: Optional[int] = None,
+    chunk_size: int = 10000,
+    lazy: bool = False,
+    compiled: bool = False,
+) -> Union[list, Iterator]:
+    """Parse many dictionaries to the same class sharing a single parse plan.
+
+    Parameters
+    ----------
+    data : Iterable[dict]
+        The records to parse
+    Cls : type
+        The class to parse each record to
+    strict : bool
+        Passed to `dict_to_cls`
+    workers : Optional[int]
+        If greater than 1 the records are split into chunks of `chunk_size` and parsed
+        in a process pool. Cls and the records must be picklable.
+    chunk_size : int
+        Number of records sent to a worker at a time
+    lazy : bool
+        If True return a generator instead of a list
+    compiled : bool
+        Use the generated parser function for Cls, see `compile_parser`
+
+    Returns
+    -------
+    Union[list, Iterator]
+        The parsed instances in the same order as data
+    """
+    out = _iter_dict_to_cls_many(data, Cls, strict, workers, chunk_size, compiled)
+    return out if lazy else list(out)
+
+
+COLUMN_DTYPES = {
+    int: np.int64,
+    float: np.float64,
+    bool: np.bool_,
+    str: np.str_,
+    np.float32: np.float32,
+    np.float64: np.float64,
+    np.int32: np.int32,
+    np.int64: np.int64,
+}
+
+
+def _get_field_defaults(Cls) -> Dict[str, Any]:
+    if is_dataclass(Cls):
+        defaults = {}
+        for fd in fields(Cls):
+            if fd.default is not MISSING:
+                defaults[fd.name] = fd.default
+            elif fd.default_factory is not MISSING:
+                defaults[fd.name] = fd.default_factory()
+        return defaults
+    return dict(getattr(Cls, "_field_defaults", {}))
+
+
+def _parse_column(field_plan: FieldParsePlan, values: list, strict=False) -> np.ndarray:
+    f, t, tt, parser = field_plan
+    base_type = get_optional_arg(tt)
+    if is_enum(base_type):
+        values = [v.value if isinstance(v, base_type) else v for v in values]
+        # Validate each unique value once
+        for v in set(values):
+            parse_enum_val(f, base_type, v, strict)
+        return np.array(values)
+    if base_type not in COLUMN_DTYPES or parser is None:
+        raise TypeError(f"Field {f} of type {t} cannot be parsed to a column")
+    dtype = COLUMN_DTYPES[base_type]
+    if any(v is None for v in values):
+        if not np.issubdtype(dtype, np.floating):
+            raise ValueError(f"Field {f} of type {t} contains None values")
+        values = [np.nan if v is None else v for v in values]
+    try:
+        if dtype is np.bool_ and not all(isinstance(v, (bool, np.bool_)) for v in values):
+            # numpy does not parse strings to bool the same way as python
+            raise ValueError()
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        parsed = [parse_base_val(f, base_type, v, strict=True) for v in values]
+        return np.array(parsed, dtype=dtype)
+
+
+def dict_to_columns(
+    data: Iterable[dict], Cls, structured: bool = False, strict=False
+) -> Union[Dict[str, np.ndarray], np.ndarray]:
+    """Parse a list of dictionaries to one numpy array per field of Cls.
+
+    Cls must be a dataclass or NamedTuple whose fields are base types or enums.
+    Enum fields are stored as their values. Missing fields are filled with the class
+    defaults and None values in float fields are stored as nan.
+
+    Parameters
+    ----------
+    data : Iterable[dict]
+        The records to parse
+    Cls : type
+        The class describing the record fields
+    structured : bool
+        If True return a single numpy structured array instead of a dict of arrays
+    strict : bool
+        If True raise an error for record keys that are not fields of Cls
+
+    Returns
+    -------
+    Union[Dict[str, np.ndarray], np.ndarray]
+        The parsed columns
+    """
+    records = data if isinstance(data, list) else list(data)
+    plan = get_parse_plan(Cls)
+    if strict:
+        for d in records:
+            invalid_data_keys = [k for k in d.keys() if k not in plan.field_names]
+            if len(invalid_data_keys) > 0:
+                first_invalid_key = invalid_data_keys[0]
+                raise Exception("{} must be in {} fields".format(first_invalid_key, Cls.__name__))
+    defaults = _get_field_defaults(Cls)
+    columns = {}
+    for field_plan in plan.fields:
+        f = field_plan.name
+        if f in defaults:
+            default = defaults[f]
+            values = [d.get(f, default) for d in records]
+        else:
+            try:
+                values = [d[f] for d in records]
+            except KeyError as e:
+                raise ValueError(f"Missing required field {f} for {Cls.__name__}") from e
+        columns[f] = _parse_column(field_plan, values, strict)
+    if not structured:
+        return columns
+    out = np.empty(len(records), dtype=[(f, c.dtype) for f, c in columns.items()])
+    for f, c in columns.items():
+        out[f] = c
+    return out
+
+
 def get_next_val(last_val, k):
     next_val = None
     next_val = last_val[k] if isinstance(last_val, dict) else next_val
@@ -419,8 +1035,38 @@ def set_next_val(obj, acc):
     return next_val
 
 
-def _replace_recursive(data_tuple: NamedTuple, location: str, value: Any) -> NamedTuple:
-    """replaces a value in a tuple using a dot notation str location"""
+def set_next_vals(obj, updates: Dict[str, Any], structural_sharing: bool = False):
+    """Functional update of several keys of a container in one copy.
+
+    If structural_sharing is True the container is shallow copied so all values that
+    are not updated are shared with obj. Otherwise obj is deep copied.
+    """
+    if isinstance(obj, (dict, list, np.ndarray)):
+        if structural_sharing:
+            new_obj = obj.copy()
+        else:
+            new_obj = deepcopy(obj)
+        is_dict = isinstance(obj, dict)
+        for k, v in updates.items():
+            new_obj[k if is_dict else int(k)] = v
+        return new_obj
+    if is_dataclass(obj):
+        return replace(obj, **updates)  # type: ignore
+    if isNamedTuple(obj):
+        return obj._replace(**updates)  # type: ignore
+    raise ValueError()
+
+
+def _replace_recursive(
+    data_tuple: NamedTuple, location: str, value: Any, structural_sharing: bool = False
+) -> NamedTuple:
+    """replaces a value in a tuple using a dot notation str location
+
+    If structural_sharing is True only the containers along the path to location are
+    shallow copied and all other values are shared with data_tuple.
+    """
+    if structural_sharing:
+        return replace_recursive_many(data_tuple, {location: value}, structural_sharing)
     locations = location.split(".")
 
     def get_val(arr, k):
@@ -441,30 +1087,84 @@ def _replace_recursive(data_tuple: NamedTuple, location: str, value: Any) -> Nam
     return new_data[1]  # type: ignore
 
 
+def _replace_with_trie(obj, trie: _PathTrieNode, structural_sharing: bool):
+    updates = {}
+    for k, node in trie.children.items():
+        if node.has_value:
+            v = node.value
+            if node.children:
+                v = _replace_with_trie(v, node, structural_sharing)
+        else:
+            v = _replace_with_trie(get_next_val(obj, k), node, structural_sharing)
+        updates[k] = v
+    return set_next_vals(obj, updates, structural_sharing)
+
+
+def replace_recursive_many(data: T, values: Dict[str, Any], structural_sharing: bool = False) -> T:
+    """Functional update of several dot notation str locations in one pass.
+
+    Each container along the paths is copied once no matter how many locations below
+    it are replaced. If a location and one of its prefixes are both replaced the nested
+    location is applied to the new prefix value.
+    See `_replace_recursive` for structural_sharing.
+
+    e.g.
+    ```
+    replace_recursive_many(state, {"a.lat": 5, "b.0.foo": "world"}, structural_sharing=True)
+    ```
+    """
+    return _replace_with_trie(data, _build_path_trie(values), structural_sharing)
+
+
 def get_val_from_tuple(data_tuple: NamedTuple, location: str):
     """Helper class to get a nested value from a tuple
     uses get_nested_val"""
     return get_nested_val(data_tuple._asdict(), location)
 
 
-def unpack(obj):
-    """https://stackoverflow.com/questions/33181170/how-to-convert-a-nested-namedtuple-to-a-dict"""
+_UNPACK_SCALAR_TYPES = frozenset([int, float, str, bool, type(None)])
+
+
+def _unpack_children(obj):
+    if type(obj) in _UNPACK_SCALAR_TYPES:
+        return None
     if isinstance(obj, dict):
-        return {key: unpack(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [unpack(value) for value in obj]
-    elif isNamedTuple(obj):
-        return {key: unpack(value) for key, value in obj._asdict().items()}
-    elif isinstance(obj, tuple):
-        return tuple(unpack(value) for value in obj)
-    elif is_dataclass(obj):
-        return unpack(asdict(obj))  # type: ignore
-    elif isinstance(obj, np.ndarray):
-        return unpack(obj.tolist())
-    elif issubclass(type(obj), enum.Enum):
-        return obj.value
-    else:
+        return obj.items()
+    if isinstance(obj, list):
+        return enumerate(obj)
+    if isinstance(obj, tuple):
+        return zip(obj._fields, obj) if isNamedTuple(obj) else enumerate(obj)
+    if isinstance(obj, np.ndarray):
+        return enumerate(obj.tolist()) if obj.dtype == object and obj.ndim > 0 else None
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return [(f.name, getattr(obj, f.name)) for f in fields(obj)]
+    return None
+
+
+def _unpack_leaf(obj):
+    if type(obj) in _UNPACK_SCALAR_TYPES:
         return obj
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    return obj
+
+
+def _unpack_combine(obj, items):
+    if isinstance(obj, (list, np.ndarray)):
+        return [v for _, v in items]
+    if isinstance(obj, tuple) and not isNamedTuple(obj):
+        return tuple([v for _, v in items])
+    return dict(items)
+
+
+def unpack(obj):
+    """Convert nested named tuples, dataclasses, numpy arrays and enums to python objects.
+
+    https://stackoverflow.com/questions/33181170/how-to-convert-a-nested-namedtuple-to-a-dict
+    """
+    return fold(obj, _unpack_children, _unpack_leaf, _unpack_combine, detect_cycles=True)
 
 
 def check_types(obj):
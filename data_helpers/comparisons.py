@@ -7,10 +7,28 @@ except ImportError:
     pass
 
 from inspect import isclass
+from dataclasses import fields, is_dataclass
+from functools import lru_cache
 from enum import Enum
 import numpy as np
 from collections.abc import Sequence as CSequence
-from typing import NamedTuple, List, Sequence, Union, Tuple, Any, get_args
+from typing import (
+    NamedTuple,
+    List,
+    Sequence,
+    Union,
+    Tuple,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Set,
+    get_args,
+)
+
+from data_helpers.traversal import CYCLE_CHECK_DEPTH
 
 BASE_TYPES = [float, int, str, bool, np.float32, np.float64, np.int32, np.int64]
 
@@ -114,6 +132,60 @@ def is_dictionary(t) -> bool:
     return t is type({"foo": "bar"})
 
 
+class TypeKind(NamedTuple):
+    """Classification of a type annotation. See `get_type_kind`."""
+
+    is_base: bool
+    is_base_type: bool
+    is_optional: bool
+    is_union: bool
+    is_iterable: bool
+    is_enum: bool
+    is_named_tuple: bool
+    is_field_class: bool
+    is_dictionary: bool
+    is_dataclass: bool
+
+
+TYPE_KIND_CACHE_SIZE = 2048
+
+
+def classify_type(t) -> TypeKind:
+    """Classify a type annotation without using the cache."""
+    return TypeKind(
+        is_base=is_base_cls(t),
+        is_base_type=any(t is b for b in BASE_TYPES),
+        is_optional=is_optional(t),
+        is_union=is_union(t),
+        is_iterable=is_iterable(t),
+        is_enum=is_enum(t),
+        is_named_tuple=is_named_tuple(t),
+        is_field_class=is_field_class(t),
+        is_dictionary=is_dictionary(t),
+        is_dataclass=is_dataclass(t),
+    )
+
+
+_classify_type_cached = lru_cache(maxsize=TYPE_KIND_CACHE_SIZE)(classify_type)
+
+
+def get_type_kind(t) -> TypeKind:
+    """Get the cached classification of a type annotation.
+
+    The result of all the `is_*` checks is computed once per annotation and stored in a
+    bounded LRU cache. Unhashable annotations are classified without caching.
+    """
+    try:
+        return _classify_type_cached(t)
+    except TypeError:
+        return classify_type(t)
+
+
+def clear_type_kind_cache() -> None:
+    """Clear the cache used by `get_type_kind`."""
+    _classify_type_cached.cache_clear()
+
+
 def isNamedTuple(t):
     """helper function to check if t is a named tuple.
     This is not a perfect check!"""
@@ -126,49 +198,142 @@ def get_dict_differences(dict_a: dict, dict_b: dict):
     return [(a, str(dict_a[a]) + " => " + str(dict_b[a])) for a in different_keys]
 
 
-def are_equal_safe(val_a: Any, val_b: Any):
-    """Safe comparison that deals with lists"""
-    while True:
-        are_equal = None
-        are_same_type = type(val_a) is type(val_b)
-        if not are_same_type:
-            are_equal = False
-            break
+EqualSafe = Callable[[Any, Any], Union[bool, Iterable[Tuple[Any, Any]]]]
 
-        type_of_val = type(val_a)
-        if are_same_type and type_of_val == "NoneType":
-            are_equal = val_a == val_b
-            break
-        if are_same_type and isinstance(val_a, str):
-            are_equal = val_a == val_b
-            break
-        if are_same_type and isinstance(val_a, int):
-            are_equal = val_a == val_b
-            break
-        if are_same_type and val_a is None:
-            are_equal = val_a == val_b
-            break
-        if are_same_type and isinstance(val_a, float):
-            are_equal = val_a == val_b
-            break
-        if are_same_type and type_of_val == "list":
-            are_equal = np.array_equal(val_a, val_b)
-            break
-        if are_same_type and type_of_val in [np.ndarray, list]:
-            are_equal = np.array_equal(val_a, val_b)
-            break
-        if are_same_type and isinstance(val_a, tuple) and type_of_val is tuple:
-            are_equal = np.array_equal(val_a, val_b)
-            break
-        if are_same_type and isinstance(val_a, tuple) and type_of_val is not tuple:
-            # Assume to be NamedTuple
-            are_equal = tuples_are_equal(val_a, val_b)  # type: ignore
-            break
 
-        if are_equal is None:
-            raise TypeError("Invalid compare type ", type_of_val, val_a)
+def _equal_values(val_a, val_b) -> bool:
+    return bool(val_a == val_b)
 
-    return are_equal
+
+_VALUE_TYPES = frozenset([type(None), bool, int, float, complex, str, bytes])
+
+
+def _equal_sequences(val_a, val_b):
+    if len(val_a) != len(val_b):
+        return False
+    return zip(val_a, val_b)
+
+
+def _equal_dicts(val_a: dict, val_b: dict):
+    if val_a.keys() != val_b.keys():
+        return False
+    return zip(val_a.values(), map(val_b.__getitem__, val_a))
+
+
+def _equal_dataclasses(val_a, val_b):
+    return ((getattr(val_a, f.name), getattr(val_b, f.name)) for f in fields(val_a))
+
+
+def _equal_arrays(val_a: np.ndarray, val_b: np.ndarray):
+    if val_a.shape != val_b.shape:
+        return False
+    if val_a.dtype == object or val_b.dtype == object:
+        return zip(val_a.flat, val_b.flat)
+    return bool(np.array_equal(val_a, val_b))
+
+
+_EQUAL_SAFE_TYPES: Dict[type, EqualSafe] = {
+    type(None): _equal_values,
+    bool: _equal_values,
+    int: _equal_values,
+    float: _equal_values,
+    complex: _equal_values,
+    str: _equal_values,
+    bytes: _equal_values,
+    Enum: _equal_values,
+    np.generic: _equal_values,
+    list: _equal_sequences,
+    tuple: _equal_sequences,
+    dict: _equal_dicts,
+    np.ndarray: _equal_arrays,
+}
+_EQUAL_SAFE_CACHE: Dict[type, Optional[EqualSafe]] = {}
+
+
+def register_equal_safe(t: type, equal: EqualSafe) -> None:
+    """Set how `are_equal_safe` compares two values of type t or its subclasses.
+
+    equal(val_a, val_b) is only called with values of the same type. It returns
+    whether they are equal or, for containers, an iterable of the (item_a, item_b)
+    pairs that `are_equal_safe` compares next so nested values do not use the stack.
+    """
+    _EQUAL_SAFE_TYPES[t] = equal
+    _EQUAL_SAFE_CACHE.clear()
+
+
+def _get_equal_safe(t: type) -> Optional[EqualSafe]:
+    try:
+        return _EQUAL_SAFE_CACHE[t]
+    except KeyError:
+        pass
+    equal = next((_EQUAL_SAFE_TYPES[b] for b in t.__mro__ if b in _EQUAL_SAFE_TYPES), None)
+    if equal is None and is_dataclass(t):
+        equal = _equal_dataclasses
+    _EQUAL_SAFE_CACHE[t] = equal
+    return equal
+
+
+def are_equal_safe(val_a: Any, val_b: Any) -> bool:
+    """Safe comparison that deals with lists, arrays and nested values.
+
+    Values of different types are not equal. Lists, tuples, named tuples, dicts,
+    dataclasses and object arrays are compared item by item with an explicit stack and
+    stop at the first mismatch. Numeric arrays are compared with np.array_equal.
+    Raises TypeError for types without a comparison, see `register_equal_safe`, and
+    ValueError if the values contain a cycle.
+    """
+    type_of_val = type(val_a)
+    if type_of_val is not type(val_b):
+        return False
+    if type_of_val in _VALUE_TYPES:
+        return bool(val_a == val_b)
+    equal = _get_equal_safe(type_of_val)
+    if equal is None:
+        raise TypeError("Invalid compare type ", type_of_val, val_a)
+    result = equal(val_a, val_b)
+    if isinstance(result, (bool, np.bool_)):
+        return bool(result)
+    on_path: Set[Tuple[int, int]] = set()
+    stack: List[Tuple[Iterator[Tuple[Any, Any]], Optional[Tuple[int, int]]]] = [
+        (iter(result), None)
+    ]
+    while stack:
+        items, pair_id = stack[-1]
+        for item_a, item_b in items:
+            item_type = type(item_a)
+            if item_type is not type(item_b):
+                return False
+            if item_type in _VALUE_TYPES:
+                # Compare scalars and nested lists inline instead of dispatching every item
+                if item_a != item_b:
+                    return False
+                continue
+            if item_type is list:
+                if len(item_a) != len(item_b):
+                    return False
+                result = zip(item_a, item_b)
+            else:
+                equal = _get_equal_safe(item_type)
+                if equal is None:
+                    raise TypeError("Invalid compare type ", item_type, item_a)
+                result = equal(item_a, item_b)
+                if isinstance(result, (bool, np.bool_)):
+                    if not result:
+                        return False
+                    continue
+            child_id = None
+            if len(stack) >= CYCLE_CHECK_DEPTH:
+                child_id = (id(item_a), id(item_b))
+                if child_id in on_path:
+                    raise ValueError(f"Cycle detected in {item_type.__name__}")
+                on_path.add(child_id)
+            stack.append((iter(result), child_id))
+            break
+        else:
+            stack.pop()
+            if pair_id is not None:
+                on_path.discard(pair_id)
+    return True
 
 
 def compare_named_tuples(tuple_a: NamedTuple, tuple_b: NamedTuple):
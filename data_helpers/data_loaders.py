@@ -1,7 +1,10 @@
 from pathlib import Path
 import json
 import csv
-from .cls_parsing import dict_to_cls
+import re
+from itertools import chain
+from typing import IO, Any, Iterator, NamedTuple, Optional, Tuple
+from .cls_parsing import dict_to_cls, dict_to_cls_many
 
 
 def load_json_to_cls(file_path: Path, cls):
@@ -11,6 +14,240 @@ def load_json_to_cls(file_path: Path, cls):
         return cls_obj
 
 
+_JSON_WHITESPACE = " \t\n\r"
+_JSON_STRUCTURE = re.compile(r'[\[\]{}"]')
+_JSON_STRING_END = re.compile(r'["\\]')
+_JSON_SCALAR_END = re.compile(r"[,\]\s]")
+
+
+class _ScanState(NamedTuple):
+    """Where to resume scanning a partially read json value."""
+
+    pos: int
+    depth: int
+    in_string: bool
+
+
+def _scan_json_value(buffer: str, state: _ScanState) -> Tuple[_ScanState, bool]:
+    """Scan a json object, array or string for its end without decoding it.
+
+    Returns the state to resume from once more data is read and if the value is
+    complete, in which case state.pos is the end of the value.
+    """
+    pos, depth, in_string = state
+    n = len(buffer)
+    while pos < n:
+        if in_string:
+            match = _JSON_STRING_END.search(buffer, pos)
+            if match is None:
+                return _ScanState(n, depth, True), False
+            pos = match.end()
+            if match.group() == "\\":
+                # Skip the escaped character, which may not have been read yet
+                pos += 1
+                continue
+            in_string = False
+            if depth == 0:
+                return _ScanState(pos, 0, False), True
+            continue
+        match = _JSON_STRUCTURE.search(buffer, pos)
+        if match is None:
+            return _ScanState(n, depth, False), False
+        pos = match.end()
+        char = match.group()
+        if char == '"':
+            in_string = True
+        elif char in "[{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return _ScanState(pos, 0, False), True
+    return _ScanState(pos, depth, in_string), False
+
+
+def _find_json_value_end(buffer: str, idx: int, state: Optional[_ScanState], eof: bool):
+    """Find the end of the json value starting at idx.
+
+    Returns (end, state) where end is None if more data is needed.
+    """
+    if buffer[idx] in '[{"':
+        state, complete = _scan_json_value(buffer, state or _ScanState(idx, 0, False))
+        return (state.pos if complete else None), state
+    match = _JSON_SCALAR_END.search(buffer, idx)
+    if match is not None:
+        return match.start(), None
+    return (len(buffer) if eof else None), None
+
+
+def _iter_json_array(file_raw: IO[str], buffer: str, chunk_size: int) -> Iterator[Any]:
+    """Incrementally decode the items of a top level json array.
+
+    buffer must start with the opening "[" of the array. An item that cannot be
+    decoded from the buffer is scanned for its end as more data is read and only
+    decoded again once it is complete, so large items are not decoded repeatedly and
+    malformed items raise as soon as they have been read.
+    """
+    decoder = json.JSONDecoder()
+    idx = 1
+    expect_value = True
+    eof = False
+    scanning = False
+    state: Optional[_ScanState] = None
+    while True:
+        # Skip whitespace and separators
+        while idx < len(buffer) and buffer[idx] in _JSON_WHITESPACE:
+            idx += 1
+        end = None
+        if idx < len(buffer):
+            char = buffer[idx]
+            if char == "]":
+                return
+            if not expect_value:
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in json array but got {char!r}")
+                idx += 1
+                expect_value = True
+                continue
+            if not scanning:
+                try:
+                    value, end = decoder.raw_decode(buffer, idx)
+                except json.JSONDecodeError:
+                    end = None
+                # A number may be truncated at the end of the buffer, e.g. "1.5e" decodes
+                # as 1.5, so only accept it once the character after it has been read
+                if end is not None and (
+                    char in '[{"'
+                    or (eof and end == len(buffer))
+                    or _JSON_SCALAR_END.match(buffer, end) is not None
+                ):
+                    yield value
+                    expect_value = False
+                    idx = end
+                    continue
+                scanning = True
+            end, state = _find_json_value_end(buffer, idx, state, eof)
+        if end is None:
+            if eof:
+                raise ValueError("Unexpected end of json array")
+            # Read at least as much as is pending so a large item is copied and
+            # scanned a bounded number of times
+            chunk = file_raw.read(max(chunk_size, len(buffer) - idx))
+            eof = not chunk
+            buffer = buffer[idx:] + chunk
+            if state is not None:
+                state = state._replace(pos=state.pos - idx)
+            idx = 0
+            continue
+        value, value_end = decoder.raw_decode(buffer, idx)
+        if value_end != end:
+            raise ValueError(f"Invalid json value at {buffer[value_end:end][:20]!r}")
+        yield value
+        expect_value = False
+        scanning = False
+        state = None
+        idx = end
+
+
+def _is_json_array(file_raw: IO[str], buffer: str, chunk_size: int) -> Tuple[bool, str]:
+    """Check if a file starting with "[" is a json array or NDJSON with array records.
+
+    The file is NDJSON if its first line is a complete json value and more values
+    follow it. A json array on a single line is read whole to check what follows it.
+
+    Returns if it is an array and the buffer including any data read.
+    """
+    chunks = [buffer]
+    newline = buffer.find("\n")
+    while newline == -1:
+        chunk = file_raw.read(chunk_size)
+        if not chunk:
+            return True, "".join(chunks)
+        newline = chunk.find("\n")
+        if newline != -1:
+            newline += sum(map(len, chunks))
+        chunks.append(chunk)
+    buffer = "".join(chunks)
+    while not buffer[newline:].strip():
+        chunk = file_raw.read(chunk_size)
+        if not chunk:
+            return True, buffer
+        buffer += chunk
+    try:
+        json.loads(buffer[:newline])
+    except ValueError:
+        return True, buffer
+    return False, buffer
+
+
+JSON_FORMATS = ("array", "ndjson")
+
+
+def iter_json_records(
+    file_raw: IO[str], chunk_size: int = 65536, format: Optional[str] = None
+) -> Iterator[Any]:
+    """Iterate over the records in a json file without loading the whole file.
+
+    Supports a top level json array or newline delimited json (NDJSON).
+    Only a single record is held in memory at a time. When format is None it is
+    detected from the content, which reads the whole first line of a file starting
+    with "[" to tell a json array from NDJSON whose records are arrays. Pass
+    format="array" for files written with json.dump to skip this.
+
+    Args:
+        file_raw: The file to read.
+        chunk_size: The number of characters read at a time.
+        format: "array", "ndjson" or None to detect the format.
+    """
+    if format is not None and format not in JSON_FORMATS:
+        raise ValueError(f"Invalid json format {format!r}, expected one of {JSON_FORMATS}")
+    if format == "ndjson":
+        for line in file_raw:
+            if line.strip():
+                yield json.loads(line)
+        return
+    buffer = ""
+    while not buffer.strip():
+        chunk = file_raw.read(chunk_size)
+        if not chunk:
+            return
+        buffer += chunk
+    buffer = buffer.lstrip()
+    if format == "array":
+        if buffer[0] != "[":
+            raise ValueError(f"Expected a json array but got {buffer[0]!r}")
+        yield from _iter_json_array(file_raw, buffer, chunk_size)
+        return
+    if buffer[0] == "[":
+        is_array, buffer = _is_json_array(file_raw, buffer, chunk_size)
+        if is_array:
+            yield from _iter_json_array(file_raw, buffer, chunk_size)
+            return
+    # NDJSON - complete the partially read line then continue line by line
+    lines = chain((buffer + file_raw.readline()).splitlines(), file_raw)
+    for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_to_cls(
+    file_path: Path, cls, strict=False, compiled=False, format: Optional[str] = None
+) -> Iterator:
+    """Stream instances of cls from a json array or newline delimited json file.
+
+    Each record is parsed with `dict_to_cls` as it is read so peak memory is bounded
+    by a single record rather than the whole file. See `iter_json_records` for format.
+    """
+    with open(file_path) as file_raw:
+        yield from dict_to_cls_many(
+            iter_json_records(file_raw, format=format),
+            cls,
+            strict=strict,
+            lazy=True,
+            compiled=compiled,
+        )
+
+
 def json_loader(fp):
     with open(fp) as f:
         return json.load(f)
@@ -1,12 +1,29 @@
+from collections.abc import Mapping
 from itertools import zip_longest
 from enum import Enum
 from copy import deepcopy
-from dataclasses import asdict, is_dataclass, replace
-from typing import List, Union
+from dataclasses import fields, is_dataclass, replace
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
 
 import numpy as np
 
-from data_helpers.comparisons import BASE_TYPES, is_base_cls, isNamedTuple, is_enum, is_iterable
+from data_helpers.comparisons import BASE_TYPES, get_type_kind, isNamedTuple
+from data_helpers.traversal import fold, link_path, unlink_path, walk
 
 
 def get_val_from_obj(obj, k):
@@ -56,102 +73,861 @@ def get_nested_val(data: dict, location_str: str):
     assert result == []
     ```
     """
-    loc_split = location_str.split(".")
-    loc_arr = [loc_split[i:] for i in range(0, len(loc_split))]
-    out = data
-    for i in range(len(loc_arr)):
-        k = loc_split[i]
-        if k != "_":
+    parts = location_str.split(".")
+    if "_" not in parts:
+        out = data
+        for k in parts:
             out = get_val_from_obj(out, k)
-        if k == "_":
-            if i == len(loc_arr) - 1:
-                out = out
+        return out
+
+    def resolve(obj, i):
+        # Follow the path up to the next wildcard
+        while i < len(parts) and parts[i] != "_":
+            obj = get_val_from_obj(obj, parts[i])
+            i += 1
+        return obj, i
+
+    def children(node):
+        obj, i = node
+        if i >= len(parts) - 1:
+            return None
+        return ((j, resolve(o, i + 1)) for j, o in enumerate(obj))
+
+    return fold(
+        resolve(data, 0),
+        children,
+        lambda node: node[0],
+        lambda node, results: [v for _, v in results],
+    )
+
+
+QUERY_CACHE_SIZE = 1024
+
+
+class _QueryWildcard(NamedTuple):
+    pass
+
+
+class _QueryKey(NamedTuple):
+    key: str
+    index: Optional[int]
+
+
+class _QuerySlice(NamedTuple):
+    slice: slice
+
+
+class _QueryAlternatives(NamedTuple):
+    keys: Tuple[_QueryKey, ...]
+
+
+def _parse_query_key(part: str) -> _QueryKey:
+    return _QueryKey(part, int(part) if part.lstrip("-").isdigit() else None)
+
+
+def _parse_query_part(part: str):
+    if part == "_":
+        return _QueryWildcard()
+    if "|" in part:
+        return _QueryAlternatives(tuple(_parse_query_key(k) for k in part.split("|")))
+    if ":" in part:
+        slice_args = part.split(":")
+        if len(slice_args) > 3:
+            raise ValueError(f"Invalid slice {part}")
+        return _QuerySlice(slice(*[int(a) if a else None for a in slice_args]))
+    return _parse_query_key(part)
+
+
+def _get_query_key(obj, step: _QueryKey):
+    if isinstance(obj, dict):
+        return obj[step.key]
+    if isinstance(obj, (list, np.ndarray)):
+        return obj[int(step.key) if step.index is None else step.index]
+    if isNamedTuple(obj) or is_dataclass(obj):
+        return getattr(obj, step.key)
+    raise ValueError(f"Cannot get {step.key} from {obj}")
+
+
+class NestedQuery:
+    """A dot notation query that is parsed once and applied many times.
+
+    Extends the `get_nested_val` syntax with:
+
+    - `_` wildcards which can be used multiple times. Over a dict they select the values.
+    - slices e.g. `arr.2:10.x` or `arr.::2`
+    - key alternatives e.g. `bar.roo|ree`
+
+    Each wildcard, slice or alternative returns a list of the results of the rest of the
+    query. When these select from a numeric numpy array and the rest of the query only
+    indexes that array the result is gathered with a single vectorised index and a numpy
+    array is returned. Use `compile_query` to get a cached instance.
+
+    e.g.
+    ```
+    query = compile_query("dictlist._.foo")
+    query(data)  # ["abc", "def"]
+    compile_query("matrix._.1")(np.ones((10, 3)))  # np.ones(10)
+    ```
+    """
+
+    __slots__ = ("query", "steps")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.steps = tuple(_parse_query_part(p) for p in query.split("."))
+
+    def __repr__(self):
+        return f"NestedQuery({self.query!r})"
+
+    def __call__(self, data):
+        return self._apply(data, 0)
+
+    def apply(self, data):
+        """Apply the query to data."""
+        return self._apply(data, 0)
+
+    def _vectorised_index(self, arr: np.ndarray, i: int) -> Optional[tuple]:
+        """Get the numpy index for the remaining steps or None if not possible."""
+        remaining = self.steps[i:]
+        if arr.dtype == object or len(remaining) > arr.ndim:
+            return None
+        index = []
+        for step in remaining:
+            if isinstance(step, _QueryWildcard):
+                index.append(slice(None))
+            elif isinstance(step, _QuerySlice):
+                index.append(step.slice)
+            elif isinstance(step, _QueryKey) and step.index is not None:
+                index.append(step.index)
             else:
-                out = [get_nested_val(o, ".".join(loc_arr[i + 1])) for o in out]
-            break
-    return out
+                return None
+        return tuple(index)
+
+    def _apply(self, obj, i: int):
+        steps = self.steps
+        while i < len(steps):
+            step = steps[i]
+            if isinstance(step, _QueryKey):
+                obj = _get_query_key(obj, step)
+                i += 1
+                continue
+            if isinstance(obj, np.ndarray):
+                index = self._vectorised_index(obj, i)
+                if index is not None:
+                    return obj[index]
+            if isinstance(step, _QueryAlternatives):
+                items = [_get_query_key(obj, k) for k in step.keys]
+            elif isinstance(step, _QuerySlice):
+                if isinstance(obj, dict):
+                    raise ValueError(f"Cannot slice {obj}")
+                items = obj[step.slice]
+            elif isinstance(obj, dict):
+                items = obj.values()
+            elif isNamedTuple(obj) or is_dataclass(obj):
+                items = [getattr(obj, f) for f in _get_field_names(obj)]
+            else:
+                items = obj
+            return [self._apply(o, i + 1) for o in items]
+        return obj
+
+
+def _get_field_names(obj) -> Tuple[str, ...]:
+    if isNamedTuple(obj):
+        return obj._fields
+    return tuple(f.name for f in fields(obj))
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def compile_query(query: str) -> NestedQuery:
+    """Get a cached `NestedQuery` for a dot notation query."""
+    return NestedQuery(query)
+
+
+def _iter_child_items(obj) -> Iterator[Tuple[Any, bool, Any]]:
+    """Iterate over the (key, is_attribute, value) children of a container.
+
+    Covers the same container kinds as `get_val_from_obj`. Only object arrays are
+    expanded as the items of numeric arrays are leaves.
+    """
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield k, False, v
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            yield i, False, v
+    elif isinstance(obj, np.ndarray):
+        if obj.dtype == object or obj.ndim > 1:
+            for i, v in enumerate(obj):
+                yield i, False, v
+    elif isNamedTuple(obj):
+        for k in obj._fields:
+            yield k, True, getattr(obj, k)
+    elif is_dataclass(obj) and not isinstance(obj, type):
+        for f in fields(obj):
+            yield f.name, True, getattr(obj, f.name)
+
+
+class PathIndex:
+    """An index of every reachable dot notation path in a document.
+
+    The document is walked once and each path is mapped to a reference to its parent
+    container so lookups are O(1) and return the current value even if the value has
+    been replaced. If a container on the path is replaced then `invalidate` must be called
+    with the path of that container. Paths that are not indexed, such as the items of
+    numeric arrays, fall back to `get_nested_val` from the nearest indexed parent.
+
+    Understands the same container kinds as `get_val_from_obj`. Raises a ValueError if
+    the document contains a cycle.
+
+    e.g.
+
+    ```
+    index = PathIndex(data)
+    index["bar.ree.sow"]
+    data["bar"]["ree"] = {"sow": 11}
+    index.invalidate("bar.ree")
+    ```
+    """
+
+    def __init__(self, data, sep="."):
+        self.data = data
+        self.sep = sep
+        self._refs: Dict[str, Tuple[Any, Any, bool]] = {}
+        self._children: Dict[str, List[str]] = {}
+        self._index_subtree("", data)
+
+    def _index_subtree(self, path: str, obj) -> None:
+        # Nodes are (parent path, path, (parent, key, is_attr), value) and the key of a
+        # child is its path so walk does not have to build the paths
+        sep = self.sep
+
+        def children(node):
+            node_path, obj = node[1], node[3]
+            kids = []
+            for k, is_attr, v in _iter_child_items(obj):
+                child_path = f"{node_path}{sep}{k}" if node_path else str(k)
+                kids.append((child_path, (node_path, child_path, (obj, k, is_attr), v)))
+            return kids or None
+
+        nodes = walk(
+            (None, path, None, obj),
+            children,
+            detect_cycles=True,
+            node_id=lambda node: id(node[3]),
+            root_path=path,
+            extend_path=lambda _, child_path: child_path,
+        )
+        next(nodes)
+        for _, (parent_path, child_path, ref, _), _ in nodes:
+            self._refs[child_path] = ref
+            self._children.setdefault(parent_path, []).append(child_path)
+
+    def _remove_subtree(self, path: str) -> None:
+        stack = self._children.pop(path, [])
+        while stack:
+            child_path = stack.pop()
+            del self._refs[child_path]
+            stack.extend(self._children.pop(child_path, []))
+
+    def _get_indexed(self, path: str):
+        if not path:
+            return self.data
+        parent, k, is_attr = self._refs[path]
+        return getattr(parent, k) if is_attr else parent[k]
+
+    def __getitem__(self, path: str):
+        if not path or path in self._refs:
+            return self._get_indexed(path)
+        # Fall back to the nearest indexed parent
+        parent_path, rest = path, ""
+        while parent_path:
+            parent_path, _, k = parent_path.rpartition(self.sep)
+            rest = f"{k}{self.sep}{rest}" if rest else k
+            if parent_path in self._refs:
+                break
+        return get_nested_val(self._get_indexed(parent_path), rest)
+
+    def get(self, path: str, default=None):
+        """Get the value at path or default if the path does not exist."""
+        try:
+            return self[path]
+        except (KeyError, IndexError, ValueError, AttributeError, TypeError):
+            return default
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._refs
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def paths(self) -> List[str]:
+        """All indexed paths."""
+        return list(self._refs.keys())
+
+    def invalidate(self, path: str = "") -> None:
+        """Re-index the subtree at path after it has been modified.
+
+        An empty path re-indexes the whole document.
+        """
+        if path and path not in self._refs:
+            raise KeyError(f"{path} is not indexed")
+        self._remove_subtree(path)
+        self._index_subtree(path, self._get_indexed(path))
 
 
 class ListMergeMethods(Enum):
     REPLACE_ALL = "REPLACE_ALL"
     ZIP = "ZIP"
+    REPLACE = "REPLACE"
+    JOIN = "JOIN"
 
 
-def merge_objects(a, b, list_method):
-    if a is None:
-        v = b
-    elif b is None:
-        v = a
-    elif type(a) in BASE_TYPES or is_enum(type(a)):
-        v = b
-    elif is_dataclass(a):
-        v = merge_dataclasses(a, b, list_method)
-    elif type(a) is type({}):
-        v = merge_dictionaries(a, b, list_method)
-    elif is_iterable(type(a)):
-        if len(a) == 0:
-            v = b
-        elif len(b) == 0:
-            v = a
-        else:
-            v = merge_iterable(a, b, method=list_method)
-    else:
-        print(type(a))
-        raise ValueError(f"Invalid type: {type(a)}")
-    return v
+class _Keep:
+    def __repr__(self):
+        return "KEEP"
+
+
+KEEP = _Keep()
+"""Placeholder in b that keeps the value of a when merging with `ListMergeMethods.REPLACE`."""
+
+
+def _iterable_len(v) -> int:
+    return v.size if isinstance(v, np.ndarray) else len(v)
+
+
+def merge_objects(a, b, list_method, deep_copy=False):
+    """Deep merge 2 objects. B overrides a
+
+    Dicts, dataclasses and (with `ListMergeMethods.ZIP`) lists are merged with an explicit
+    stack so the depth of the objects is not limited by the recursion limit.
+    See `merge_dictionaries` for deep_copy.
+    """
+    return _get_merger(list_method, deep_copy).merge(a, b)
 
 
-def merge_iterable(a, b, method="REPLACE_ALL"):
+def _keep_mask(b: np.ndarray) -> np.ndarray:
+    """Mask of the items in b that keep the value of a."""
+    if b.dtype.kind in "fc":
+        return np.isnan(b)
+    if b.dtype == object:
+        return np.frompyfunc(lambda v: v is None or v is KEEP, 1, 1)(b).astype(bool)
+    return np.zeros(b.shape, dtype=bool)
+
+
+def _replace_arrays(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    n = min(len(a), len(b))
+    head = np.where(_keep_mask(b[:n]), a[:n], b[:n])
+    if len(a) == len(b):
+        return head
+    return np.concatenate((head, a[n:] if len(a) > n else b[n:]))
+
+
+def merge_iterable(a, b, method="REPLACE_ALL", deep_copy=False):
     """Deep merge 2 iterables.
 
     Methods
     -------
     ZIP
+        Merge the items of a and b pairwise.
     REPLACE
+        Replace the items of a with the items of b. Items in b that are None or `KEEP`,
+        or NaN in a float array, keep the item of a.
     JOIN
+        Append the items of b to the items of a.
     REPLACE_ALL
+        Replace a with b.
 
+    REPLACE and JOIN are vectorised when both a and b are numpy arrays.
     """
+    if isinstance(method, str):
+        method = ListMergeMethods(method)
     if method == ListMergeMethods.ZIP:
-        if is_base_cls(type(a[0])):
+        if get_type_kind(type(a[0])).is_base:
             return b
-        return [merge_objects(v_a, v_b, method) for v_a, v_b in zip_longest(a, b)]
-    if method == "REPLACE":
-        raise NotImplementedError("REPLACE method not implemented")
-    if method == "JOIN":
-        raise NotImplementedError("JOIN method not implemented")
+        return _get_merger(method, deep_copy).merge(a, b)
+    if method == ListMergeMethods.REPLACE:
+        if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
+            return _replace_arrays(a, b)
+        if deep_copy:
+            a = deepcopy(a)
+        return [v_a if v_b is None or v_b is KEEP else v_b for v_a, v_b in zip_longest(a, b)]
+    if method == ListMergeMethods.JOIN:
+        if isinstance(a, np.ndarray) and isinstance(b, np.ndarray):
+            return np.concatenate((a, b))
+        return [*(deepcopy(a) if deep_copy else a), *b]
     if method == ListMergeMethods.REPLACE_ALL:
         return b
     else:
         raise ValueError("Invalid Merge Method")
 
 
-def merge_dataclasses(a, b, list_method=ListMergeMethods.REPLACE_ALL):
-    """Deep merge 2 dataclasses. B overrides a"""
-    assert is_dataclass(a) and is_dataclass(b)
-    out = replace(a)  # type: ignore
-    for k in asdict(b).keys():  # type: ignore
-        v_b = getattr(b, k)
-        v_a = getattr(a, k)
-        v = merge_objects(v_a, v_b, list_method)
-        setattr(out, k, v) if v is not None else None
+# Returned by a field merge function when the values have to be merged as a node
+_MERGE_NODE = object()
+
+
+def _merge_value_field(a, b):
+    if _needs_merge(a, b):
+        return _MERGE_NODE
+    return a if b is None else b
+
+
+def _merge_base_field(a, b):
+    if b is None:
+        return a
+    if type(a) in _BASE_TYPE_SET or a is None:
+        return b
+    return _merge_value_field(a, b)
+
+
+def _merge_dataclass_field(a, b):
+    if a is not None and b is not None and is_dataclass(a):
+        return _MERGE_NODE
+    return _merge_value_field(a, b)
+
+
+def _merge_dictionary_field(a, b):
+    if type(a) is dict and type(b) is dict:
+        return _MERGE_NODE
+    return _merge_value_field(a, b)
+
+
+_FIELD_MERGERS = {
+    "base": _merge_base_field,
+    "dataclass": _merge_dataclass_field,
+    "dictionary": _merge_dictionary_field,
+    "iterable": _merge_value_field,
+    "other": _merge_value_field,
+}
 
+
+class FieldMergePlan(NamedTuple):
+    """Resolved merging information for a single dataclass field."""
+
+    name: str
+    kind: str
+    init: bool
+    merge: Callable[[Any, Any], Any]
+
+
+class MergePlan(NamedTuple):
+    """Resolved fields and merge functions for a dataclass type.
+
+    Built once per type by `get_merge_plan` so that `merge_dataclasses` only has to
+    touch the attributes of the instances on later calls.
+    """
+
+    cls: Any
+    fields: Tuple[FieldMergePlan, ...]
+    frozen: bool
+
+
+_MERGE_PLAN_CACHE: Dict[Any, MergePlan] = {}
+
+
+def _get_field_merge_kind(t) -> str:
+    kind = get_type_kind(t)
+    if kind.is_optional:
+        t = next(arg for arg in get_args(t) if arg is not type(None))
+        kind = get_type_kind(t)
+    if kind.is_base_type or kind.is_enum:
+        return "base"
+    if kind.is_dataclass:
+        return "dataclass"
+    if kind.is_dictionary or get_origin(t) is dict:
+        return "dictionary"
+    if kind.is_iterable:
+        return "iterable"
+    return "other"
+
+
+def compile_merge_plan(cls) -> MergePlan:
+    """Resolve the fields and merge functions of a dataclass type without using the cache.
+
+    The merge function is chosen from the field annotation. It either picks the value
+    of a or b or returns `_MERGE_NODE` when the values have to be merged deeper. Values
+    that do not match their annotation fall back to checking the types of the values.
+    """
+    field_plans = []
+    for f in fields(cls):
+        kind = _get_field_merge_kind(f.type)
+        field_plans.append(FieldMergePlan(f.name, kind, f.init, _FIELD_MERGERS[kind]))
+    return MergePlan(cls, tuple(field_plans), cls.__dataclass_params__.frozen)
+
+
+def get_merge_plan(cls) -> MergePlan:
+    """Get the cached merge plan for a dataclass type, compiling it on first use."""
+    try:
+        return _MERGE_PLAN_CACHE[cls]
+    except KeyError:
+        plan = compile_merge_plan(cls)
+        _MERGE_PLAN_CACHE[cls] = plan
+        return plan
+
+
+def clear_merge_plan_cache(cls=None) -> None:
+    """Invalidate the cached merge plan for cls or all if cls is None."""
+    if cls is None:
+        _MERGE_PLAN_CACHE.clear()
+    else:
+        _MERGE_PLAN_CACHE.pop(cls, None)
+
+
+def _build_dataclass(base, plan: MergePlan, changes: Dict[str, Any]):
+    """Copy base with changes applied through the constructor so frozen types work."""
+    init_changes = {}
+    other_changes = {}
+    for fp in plan.fields:
+        if fp.init:
+            if fp.name in changes:
+                init_changes[fp.name] = changes[fp.name]
+        else:
+            # replace does not copy fields that are not in __init__
+            other_changes[fp.name] = changes.get(fp.name, getattr(base, fp.name))
+    out = replace(base, **init_changes)
+    for k, v in other_changes.items():
+        object.__setattr__(out, k, v)
     return out
 
 
-def merge_dictionaries(a, b, list_method=ListMergeMethods.REPLACE_ALL):
-    """Deep merge 2 dictionaries. B overrides a"""
+def _needs_merge(v_a, v_b) -> bool:
+    """False if merge_objects would simply pick one of the values."""
+    return not (v_a is None or v_b is None or type(v_a) in _BASE_TYPE_SET or isinstance(v_a, Enum))
+
+
+class _Merger:
+    """The children, leaf and combine functions of a merge for `fold`.
+
+    The nodes are (a, b) pairs of values. Only the pairs that need merging are visited
+    as children. The values that are simply picked from a or b are resolved in combine.
+    """
+
+    def __init__(self, list_method, deep_copy: bool):
+        if isinstance(list_method, str):
+            list_method = ListMergeMethods(list_method)
+        self.list_method = list_method
+        self.deep_copy = deep_copy
+
+    def merge(self, a, b):
+        if not _needs_merge(a, b):
+            return b if b is not None else a
+        return fold((a, b), self.children, self.leaf, self.combine, True, _pair_id)
+
+    def children(self, node):
+        a, b = node
+        if b is None:
+            return None
+        if type(a) is list:
+            if self.list_method is ListMergeMethods.ZIP and len(a) and _iterable_len(b):
+                return self._zip_children(a, b)
+            return None
+        if type(a) is dict:
+            assert type(b) is dict
+            # Values of b that replace a None or base type value of a are copied by combine
+            return [
+                (k, (v_a, v_b))
+                for k, v_b in b.items()
+                if (v_a := a.get(k)) is not None
+                and (v_b is None or not (type(v_a) in _BASE_TYPE_SET or isinstance(v_a, Enum)))
+            ]
+        kind = get_type_kind(type(a))
+        if kind.is_dataclass:
+            assert is_dataclass(b)
+            return [
+                (k, (v_a, v_b))
+                for fp in get_merge_plan(type(b)).fields
+                if fp.merge(v_a := getattr(a, k := fp.name), v_b := getattr(b, k)) is _MERGE_NODE
+            ]
+        if kind.is_iterable:
+            if self.list_method is ListMergeMethods.ZIP and _iterable_len(a) and _iterable_len(b):
+                return self._zip_children(a, b)
+            return None
+        raise ValueError(f"Invalid type: {type(a)}")
+
+    def _zip_children(self, a, b):
+        if get_type_kind(type(a[0])).is_base:
+            return None
+        return [
+            (i, (v_a, v_b))
+            for i, (v_a, v_b) in enumerate(zip_longest(a, b))
+            if _needs_merge(v_a, v_b)
+        ]
+
+    def leaf(self, node):
+        a, b = node
+        if b is None:
+            return a
+        if _iterable_len(a) == 0:
+            return b
+        if _iterable_len(b) == 0:
+            return a
+        if self.list_method in (ListMergeMethods.REPLACE_ALL, ListMergeMethods.ZIP):
+            # ZIP lists of base values are replaced
+            return b
+        return merge_iterable(a, b, method=self.list_method, deep_copy=self.deep_copy)
+
+    def combine(self, node, results):
+        a, b = node
+        deep_copy = self.deep_copy
+        if type(a) is dict:
+            if not deep_copy:
+                out = a.copy()
+                out.update(b)
+                out.update(results)
+                return out
+            merged = dict(results)
+            out = deepcopy(a)
+            for k, v_b in b.items():
+                v = merged[k] if k in merged else v_b
+                if k in a and v is a[k]:
+                    # out already has a copy of v_a
+                    continue
+                out[k] = v
+            return out
+        merged = dict(results)
+        if is_dataclass(a):
+            changes = {}
+            for fp in get_merge_plan(type(b)).fields:
+                k = fp.name
+                v = merged[k] if k in merged else getattr(b, k)
+                if v is not None and v is not getattr(a, k):
+                    changes[k] = v
+            base = deepcopy(a) if deep_copy else a
+            return _build_dataclass(base, get_merge_plan(type(b)), changes)
+        out = []
+        for i, (v_a, v_b) in enumerate(zip_longest(a, b)):
+            v = merged[i] if i in merged else (v_a if v_b is None else v_b)
+            out.append(deepcopy(v) if deep_copy and v is v_a else v)
+        return out
+
+
+def _pair_id(node):
+    return id(node[0]), id(node[1])
+
+
+@lru_cache(maxsize=None)
+def _get_merger(list_method, deep_copy: bool) -> _Merger:
+    return _Merger(list_method, deep_copy)
+
+
+_BASE_TYPE_SET = frozenset(BASE_TYPES)
+
+
+def merge_dataclasses(a, b, list_method=ListMergeMethods.REPLACE_ALL, deep_copy=False):
+    """Deep merge 2 dataclasses. B overrides a
+
+    Uses the cached `MergePlan` of b's type. The result is built through the
+    constructor so frozen dataclasses are supported.
+    See `merge_dictionaries` for deep_copy.
+    """
+    assert is_dataclass(a) and is_dataclass(b)
+    return merge_objects(a, b, list_method, deep_copy)
+
+
+def merge_dictionaries(a, b, list_method=ListMergeMethods.REPLACE_ALL, deep_copy=False):
+    """Deep merge 2 dictionaries. B overrides a
+
+    The merge is copy on write. Only the containers along the paths that b changes are
+    copied and all other values are shared with a. Values taken from b are not copied.
+    Set deep_copy to True to return a result that shares no values with a.
+    """
     assert type(a) is type({}) and type(b) is type({})
-    out = deepcopy(a)
-    for k in b.keys():
-        v_b = b.get(k)
-        v_a = a.get(k)
-        v = merge_objects(v_a, v_b, list_method)
-        out[k] = v if v is not None else None
+    return merge_objects(a, b, list_method, deep_copy)
+
+
+def _skip_replaced_values(values: list) -> list:
+    """Drop the leading base type or enum values that are replaced by the next value."""
+    start = 0
+    while start < len(values) - 1:
+        kind = get_type_kind(type(values[start]))
+        if not (kind.is_base_type or kind.is_enum):
+            break
+        start += 1
+    return values[start:]
+
 
+def _merge_many_values(values: list, list_method):
+    """Merge non None values with the same result as folding them with merge_objects."""
+    group = _skip_replaced_values(values)
+    if len(group) == 1:
+        return group[0]
+    kind = get_type_kind(type(group[0]))
+    if kind.is_dictionary:
+        return _merge_many_dictionaries(group, list_method)
+    if kind.is_dataclass:
+        return _merge_many_dataclasses(group, list_method)
+    out = group[0]
+    for v in group[1:]:
+        out = merge_objects(out, v, list_method)
     return out
 
 
+def _merge_many_dictionaries(layers: list, list_method):
+    assert all(type(d) is type({}) for d in layers)
+    values_by_key: Dict[Any, list] = {}
+    for d in layers[1:]:
+        for k, v in d.items():
+            values_by_key.setdefault(k, []).append(v)
+    first = layers[0]
+    out = first.copy()
+    for k, layer_values in values_by_key.items():
+        values = [v for v in [first.get(k), *layer_values] if v is not None]
+        out[k] = _merge_many_values(values, list_method) if values else None
+    return out
+
+
+def _merge_many_dataclasses(layers: list, list_method):
+    assert all(is_dataclass(d) for d in layers)
+    field_names: Dict[str, None] = {}
+    for d in layers[1:]:
+        field_names.update((fp.name, None) for fp in get_merge_plan(type(d)).fields)
+    first = layers[0]
+    changes = {}
+    for k in field_names:
+        values = [v for d in layers if (v := getattr(d, k)) is not None]
+        if values:
+            changes[k] = _merge_many_values(values, list_method)
+    return _build_dataclass(first, get_merge_plan(type(first)), changes)
+
+
+def merge_many(layers: Iterable[Any], list_method=ListMergeMethods.REPLACE_ALL):
+    """Deep merge any number of dictionaries or dataclasses in a single traversal.
+
+    Later layers override earlier layers. The result is the same as folding the layers
+    with `merge_objects` but each key is only visited once and no intermediate merged
+    layers are built. Untouched values are shared with the layers as in
+    `merge_dictionaries`. None layers are skipped.
+
+    e.g.
+    ```
+    config = merge_many([defaults, site, environment, user, overrides])
+    ```
+    """
+    values = [layer for layer in layers if layer is not None]
+    if not values:
+        raise ValueError("No layers to merge")
+    return _merge_many_values(values, list_method)
+
+
+_NOT_FOUND = object()
+
+
+class LayeredView(Mapping):
+    """A read-only lazy view of a stack of dictionaries or dataclasses.
+
+    Reading a key checks the layers when it is accessed instead of merging the whole
+    stack up front. Later layers override earlier layers and the leaves follow the same
+    rules as `merge_objects`, so `view.materialise()` is equal to `merge_many(layers)`.
+    Nested dictionaries and dataclasses are returned as nested views that are only
+    created when they are accessed. Resolved values are cached so the layers should not
+    be modified while the view is in use.
+
+    Keys can also be read as attributes, except for keys named after the methods of the
+    view such as "keys", "get" or "materialise" which are read with `view[...]`.
+
+    e.g.
+    ```
+    config = LayeredView([defaults, site, environment, user])
+    config["db"]["host"]
+    config.db.port
+    ```
+    """
+
+    __slots__ = ("_layers", "_list_method", "_cache")
+
+    def __init__(self, layers: Iterable[Any], list_method=ListMergeMethods.REPLACE_ALL):
+        layers = [layer for layer in layers if layer is not None]
+        if not layers:
+            raise ValueError("No layers to view")
+        for layer in layers:
+            is_instance = is_dataclass(layer) and not isinstance(layer, type)
+            if not (isinstance(layer, dict) or is_instance):
+                raise TypeError(f"Invalid layer type: {type(layer)}")
+        object.__setattr__(self, "_layers", layers)
+        object.__setattr__(self, "_list_method", list_method)
+        object.__setattr__(self, "_cache", {})
+
+    @staticmethod
+    def _get_layer_val(layer, k):
+        if isinstance(layer, dict):
+            return layer.get(k, _NOT_FOUND)
+        if k in _get_field_names(layer):
+            return getattr(layer, k)
+        return _NOT_FOUND
+
+    def _resolve(self, k):
+        found = False
+        values = []
+        for layer in self._layers:
+            v = self._get_layer_val(layer, k)
+            if v is _NOT_FOUND:
+                continue
+            found = True
+            if v is not None:
+                values.append(v)
+        if not found:
+            raise KeyError(k)
+        if not values:
+            return None
+        group = _skip_replaced_values(values)
+        kind = get_type_kind(type(group[0]))
+        if kind.is_dictionary or kind.is_dataclass:
+            return LayeredView(group, self._list_method)
+        out = group[0]
+        for v in group[1:]:
+            out = merge_objects(out, v, self._list_method)
+        return out
+
+    def __getitem__(self, k):
+        try:
+            return self._cache[k]
+        except KeyError:
+            pass
+        v = self._resolve(k)
+        self._cache[k] = v
+        return v
+
+    def __getattr__(self, k):
+        # Private names are not looked up in the layers
+        if k.startswith("_"):
+            raise AttributeError(k)
+        try:
+            return self[k]
+        except KeyError:
+            raise AttributeError(k) from None
+
+    def __setattr__(self, k, v):
+        raise AttributeError("LayeredView is read-only")
+
+    def __delattr__(self, k):
+        raise AttributeError("LayeredView is read-only")
+
+    def __contains__(self, k) -> bool:
+        return any(self._get_layer_val(layer, k) is not _NOT_FOUND for layer in self._layers)
+
+    def __iter__(self) -> Iterator[Any]:
+        seen: Dict[Any, None] = {}
+        for layer in self._layers:
+            keys = layer.keys() if isinstance(layer, dict) else _get_field_names(layer)
+            for k in keys:
+                if k not in seen:
+                    seen[k] = None
+                    yield k
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"LayeredView({self._layers!r})"
+
+    @property
+    def layers(self) -> List[Any]:
+        return list(self._layers)
+
+    def materialise(self):
+        """Merge the layers with `merge_many`."""
+        return merge_many(self._layers, self._list_method)
+
+
 def find_key(obj: object, k: str, prefix: str = "") -> Union[str, None]:
     """Find a key in a dictionary and return the full key path
 
@@ -172,20 +948,8 @@ def find_key(obj: object, k: str, prefix: str = "") -> Union[str, None]:
     Will return "bar.foo"
 
     """
-    if type(obj) is type({}):
-        for kk in obj.keys():
-            if kk == k:
-                return prefix + kk
-            else:
-                if isinstance(obj[kk], dict):
-                    sub_k = find_key(obj[kk], k, prefix + kk + ".")
-                    if sub_k is not None:
-                        return sub_k
-                if isinstance(obj[kk], list):
-                    for i, v in enumerate(obj[kk]):
-                        sub_k = find_key(v, k, prefix + kk + "." + str(i) + ".")
-                        if sub_k is not None:
-                            return sub_k
+    for path in _iter_found_key_paths(obj, k):
+        return prefix + _join_path(path)
     return None
 
 
@@ -209,33 +973,177 @@ def find_all_keys(obj: object, k: str, prefix: str = "") -> List[str]:
     Will return ["bar.foo", "bar.ree.foo"]
 
     """
-    keys = []
+    return [prefix + _join_path(path) for path in _iter_found_key_paths(obj, k)]
+
+
+def _find_key_children(obj):
+    # Only dicts and the dicts inside lists are searched
     if type(obj) is type({}):
-        for kk in obj.keys():
-            if kk == k:
-                keys.append(prefix + kk)
-            else:
-                if isinstance(obj[kk], dict):
-                    keys.extend(find_all_keys(obj[kk], k, prefix + kk + "."))
-                if isinstance(obj[kk], list):
-                    for i, v in enumerate(obj[kk]):
-                        keys.extend(find_all_keys(v, k, prefix + kk + "." + str(i) + "."))
-    return keys
-
-
-def _flatten_dict_item(k, v, parent_key="", sep=".") -> dict:
-    new_key = f"{parent_key}{sep}{k}" if parent_key else k
-    out = {}
-    if isinstance(v, dict):
-        out.update(flatten_dict(v, new_key, sep=sep))
-    elif isinstance(v, list):
-        for i, vv in enumerate(v):
-            new_key_nested = f"{parent_key}{sep}{k}{sep}{i}" if parent_key else f"{k}{sep}{i}"
-            nested_val = _flatten_dict_item(new_key_nested, vv, parent_key, sep)
-            out.update(nested_val)
-    else:
-        out[new_key] = v
-    return out
+        return obj.items()
+    if isinstance(obj, list):
+        return ((i, v) for i, v in enumerate(obj) if type(v) is type({}))
+    return None
+
+
+def _iter_found_key_paths(obj: object, k) -> Iterator[tuple]:
+    """Iterate over the paths of k in the order found by a recursive search.
+
+    The value of a matched key is not searched again.
+    """
+    if type(obj) is not type({}):
+        return
+    for path, _, _ in walk(
+        obj,
+        _find_key_children,
+        prune=lambda path, node: path is not None and path[1] == k,
+        detect_cycles=True,
+        root_path=None,
+        extend_path=link_path,
+    ):
+        if path is not None and path[1] == k:
+            yield unlink_path(path)
+
+
+def _iter_key_paths(obj: object, keys: Optional[FrozenSet[Any]]) -> Iterator[Tuple[Any, tuple]]:
+    """Iterate over the (key, path tuple) pairs of the keys in a nested dictionary.
+
+    Walks the same structure as `find_all_keys`: nested dicts and dicts inside lists.
+    The value of a matched key is not searched for the same key again.
+    If keys is None all keys are matched.
+    """
+    if type(obj) is not dict:
+        return
+
+    # Nodes are (value, keys found on the path, is a matched key)
+    def children(node):
+        v, blocked, _ = node
+        if type(v) is dict:
+            kids = []
+            for kk, vv in v.items():
+                if (keys is None or kk in keys) and kk not in blocked:
+                    kids.append((kk, (vv, blocked | {kk}, True)))
+                else:
+                    kids.append((kk, (vv, blocked, False)))
+            return kids
+        if isinstance(v, list):
+            return [(i, (vv, blocked, False)) for i, vv in enumerate(v) if type(vv) is dict]
+        return None
+
+    def prune(path, node):
+        # All keys are already found on this path
+        return keys is not None and node[2] and keys <= node[1]
+
+    nodes = walk(
+        (obj, frozenset(), False),
+        children,
+        prune=prune,
+        detect_cycles=True,
+        node_id=lambda node: id(node[0]),
+    )
+    for path, (_, _, matched), _ in nodes:
+        if matched:
+            yield path[-1], path
+
+
+def _join_path(path: tuple, sep=".") -> str:
+    return sep.join(map(str, path))
+
+
+def find_keys(obj: object, keys: Iterable[Any]) -> Dict[Any, List[str]]:
+    """Find all the paths of multiple keys in a single traversal.
+
+    Returns the same paths for each key as `find_all_keys`.
+
+    e.g.
+    keys={"foo", "sow"}
+    obj = {
+        "bar": {
+            "foo": 2,
+            "ree": {
+                "foo": 4,
+                "sow": 5,
+            }
+        }
+    }
+
+    Will return {"foo": ["bar.foo", "bar.ree.foo"], "sow": ["bar.ree.sow"]}
+
+    """
+    keys = frozenset(keys)
+    paths: Dict[Any, List[tuple]] = {k: [] for k in keys}
+    for k, path in _iter_key_paths(obj, keys):
+        paths[k].append(path)
+    return {k: [_join_path(p) for p in k_paths] for k, k_paths in paths.items()}
+
+
+class KeyIndex:
+    """An inverted index of every key in a nested dictionary to its full key paths.
+
+    Built with a single traversal and then queried repeatedly.
+    `find` and `find_all` return the same results as `find_key` and `find_all_keys`.
+    """
+
+    def __init__(self, obj: object):
+        self._paths: Dict[Any, List[tuple]] = {}
+        for k, path in _iter_key_paths(obj, None):
+            self._paths.setdefault(k, []).append(path)
+        self._joined: Dict[Any, List[str]] = {}
+
+    def __contains__(self, k) -> bool:
+        return k in self._paths
+
+    def keys(self) -> List[Any]:
+        return list(self._paths.keys())
+
+    def find_all(self, k) -> List[str]:
+        """Get all the paths of k."""
+        if k not in self._joined:
+            self._joined[k] = [_join_path(p) for p in self._paths.get(k, [])]
+        return list(self._joined[k])
+
+    def find(self, k) -> Union[str, None]:
+        """Get the first path of k or None if k is not in the index."""
+        paths = self._paths.get(k)
+        return _join_path(paths[0]) if paths else None
+
+
+def _flat_children(obj):
+    if isinstance(obj, dict):
+        return obj.items()
+    if isinstance(obj, list):
+        return enumerate(obj)
+    return None
+
+
+def iter_flat_items(data: dict, parent_key="", sep=".") -> Iterator[Tuple[Any, Any]]:
+    """Iterate over the leaves of a nested dictionary as (path, value) pairs.
+
+    Nested dicts and lists are walked with an explicit stack so there is no recursion
+    limit on the depth of data. Empty dicts and lists have no leaves.
+
+    Args:
+        data (dict): The nested dictionary to iterate.
+        parent_key (str, optional): Prefix for all paths. Defaults to ''.
+        sep (str, optional): The separator. Defaults to '.'.
+
+    Yields:
+        Tuple[str, Any]: The dot notation path and the leaf value.
+    """
+
+    def extend_path(prefix, k):
+        return k if prefix is None else f"{prefix}{sep}{k}"
+
+    nodes = walk(
+        data,
+        _flat_children,
+        detect_cycles=True,
+        root_path=parent_key if parent_key else None,
+        extend_path=extend_path,
+    )
+    next(nodes)
+    for key, v, is_leaf in nodes:
+        if is_leaf:
+            yield key, v
 
 
 def flatten_dict(data: dict, parent_key="", sep=".") -> dict:
@@ -249,8 +1157,53 @@ def flatten_dict(data: dict, parent_key="", sep=".") -> dict:
     Returns:
         dict:  The flattened dictionary.
     """
-    out = {}
-    for k, v in data.items():
-        v = _flatten_dict_item(k, v, parent_key, sep)
-        out.update(v)
+    return dict(iter_flat_items(data, parent_key, sep))
+
+
+def unflatten_dict(data: dict, sep=".") -> dict:
+    """Rebuild a nested dictionary from a flattened dictionary.
+
+    Inverse of `flatten_dict`. Path parts that are digits create lists and all other parts
+    create dicts. Missing list items are filled with None.
+
+    Args:
+        data (dict): The flattened dictionary.
+        sep (str, optional): The separator. Defaults to '.'.
+
+    Returns:
+        dict:  The nested dictionary.
+    """
+    out: dict = {}
+    for path, v in data.items():
+        if not isinstance(path, str):
+            out[path] = v
+            continue
+        parts = path.split(sep)
+        target = out
+        for i, part in enumerate(parts):
+            is_last = i == len(parts) - 1
+            key: Union[str, int] = part
+            if isinstance(target, list):
+                key = int(part)
+                if key >= len(target):
+                    target.extend([None] * (key + 1 - len(target)))
+                if is_last:
+                    target[key] = v
+                    break
+                child = target[key]
+            else:
+                if not isinstance(target, dict):
+                    raise ValueError(f"Cannot set {path} as {sep.join(parts[:i])} is a value")
+                if is_last:
+                    if isinstance(target.get(key), (dict, list)):
+                        raise ValueError(f"Cannot set {path} as it contains nested values")
+                    target[key] = v
+                    break
+                child = target.get(key)
+            if child is None:
+                child = [] if parts[i + 1].isdigit() else {}
+                target[key] = child
+            elif not isinstance(child, (dict, list)):
+                raise ValueError(f"Cannot set {path} as {sep.join(parts[: i + 1])} is a value")
+            target = child
     return out
@@ -1,48 +1,521 @@
-from dataclasses import asdict, is_dataclass
-from data_helpers.list_helpers import flatten_list
-from typing import List
-from data_helpers.comparisons import is_base_cls, is_dictionary, is_iterable
+from copy import copy
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from hashlib import blake2b
+from itertools import islice, zip_longest
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from data_helpers.comparisons import get_type_kind
+from data_helpers.traversal import fold, link_path, unlink_path, walk
 from math import isclose
 
+import numpy as np
 
-def diff(field, a, b) -> List[str]:
-    changes = []
-    item_type = type(a) if a is not None else type(b)
 
-    if is_iterable(type(a)) or is_iterable(type(b)) or a != b:
-        if a is None or b is None:
-            changes.append(f"{field}: {a} -> {b}")
-        elif is_base_cls(item_type):
-            if item_type is float and isclose(a, b, rel_tol=1e-3):
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+_MISSING = _Missing()
+"""Placeholder for a key or field that only one side has. The same as None when diffing."""
+
+_MISSING_ITEM = _Missing()
+"""Placeholder for a list item that only one side has."""
+
+
+_LEAF_TYPES = frozenset([int, float, str, bool, type(None), _Missing])
+
+
+def _iter_dict_pairs(a, b):
+    for k in a.keys():
+        yield k, (a[k], b.get(k, _MISSING))
+    for k in b.keys():
+        if k not in a:
+            yield k, (_MISSING, b[k])
+
+
+def _iter_dataclass_pairs(a, b):
+    names = dict.fromkeys(f.name for f in fields(a))
+    names.update(dict.fromkeys(f.name for f in fields(b)))
+    for k in names:
+        yield k, (getattr(a, k, _MISSING), getattr(b, k, _MISSING))
+
+
+def _diff_children(node, is_same):
+    """Get the child (a, b) pairs to compare or None if a and b are compared as leaves.
+
+    Containers where is_same(a, b) is True have no children to compare.
+    """
+    a, b = node
+    a_type = type(a)
+    b_type = type(b)
+    if a_type in _LEAF_TYPES or b_type in _LEAF_TYPES:
+        return None
+    if (a_type is np.ndarray) is not (b_type is np.ndarray) or _is_array_pair(a, b):
+        return None
+    kind = get_type_kind(a_type)
+    if kind.is_dictionary and type(b) is dict:
+        return () if is_same(a, b) else _iter_dict_pairs(a, b)
+    if kind.is_iterable and get_type_kind(type(b)).is_iterable:
+        return () if is_same(a, b) else enumerate(zip_longest(a, b, fillvalue=_MISSING_ITEM))
+    if kind.is_dataclass and is_dataclass(b):
+        return () if is_same(a, b) else _iter_dataclass_pairs(a, b)
+    return None
+
+
+_SCALAR_TYPES = frozenset([int, float, str, bool, type(None)])
+_SCALAR_TAGS = {t: b"S%s:" % t.__name__.encode() for t in _SCALAR_TYPES}
+_FLAT_TAGS = {t: b"F%s:" % t.__name__.encode() for t in (dict, list, tuple)}
+
+DIGEST_SIZE = 16
+"""The size in bytes of the blake2b digests of `SubtreeHashes`."""
+
+
+def _digest(data: bytes) -> bytes:
+    return blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+class SubtreeHashes:
+    """Memoised structural hashes of the subtrees of documents.
+
+    The hash of a subtree is a blake2b digest of a canonical encoding of its content so
+    subtrees with the same hash have the same content. `diff` uses this to skip matching
+    subtrees without walking them. The digests of dicts do not depend on the order of
+    their keys.
+
+    Scalars are encoded by value and numeric numpy arrays by their dtype, shape and
+    bytes. Other values, including NaNs, are encoded by their identity as they are only
+    known to match themselves. Equal subtrees that contain them may have different
+    hashes, they are then compared item by item.
+
+    Hashes are cached by the identity of each container and the containers are kept
+    alive by the cache. A hashed document must not be mutated, hash a baseline once and
+    pass it to `diff` to compare many documents against it.
+
+    ```
+    golden = SubtreeHashes(baseline)
+    for config in configs:
+        changes = diff("config", baseline, config, baseline_hashes=golden)
+    ```
+    """
+
+    __slots__ = ("_hashes", "_strings")
+
+    def __init__(self, root=None):
+        self._hashes: Dict[int, Tuple[bytes, object]] = {}
+        # Keys repeat across a document so the hashes of strings are cached by value
+        self._strings: Dict[str, bytes] = {}
+        if root is not None:
+            self.get(root)
+
+    def get(self, obj) -> bytes:
+        """Get the structural hash of obj."""
+        return fold(obj, self._children, self._leaf, self._combine, detect_cycles=True)
+
+    def clear(self) -> None:
+        self._hashes.clear()
+        self._strings.clear()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def _children(self, obj):
+        if id(obj) in self._hashes:
+            return None
+        obj_type = type(obj)
+        if obj_type is dict:
+            # Dicts and lists of scalars are encoded in one go with repr
+            if _SCALAR_TYPES.issuperset(map(type, obj)) and _SCALAR_TYPES.issuperset(
+                map(type, obj.values())
+            ):
+                if self._set_flat_hash(obj, lambda: "\n".join(sorted(map(repr, obj.items())))):
+                    return None
+            return obj.items()
+        if obj_type is list or obj_type is tuple:
+            if _SCALAR_TYPES.issuperset(map(type, obj)):
+                if self._set_flat_hash(obj, obj.__repr__):
+                    return None
+            return enumerate(obj)
+        if is_dataclass(obj) and not isinstance(obj, type):
+            return [(f.name, getattr(obj, f.name)) for f in fields(obj)]
+        return None
+
+    def _set_flat_hash(self, obj, to_text: Callable[[], str]) -> bool:
+        try:
+            text = to_text()
+        except ValueError:
+            # Ints too long for repr
+            return False
+        if "nan" in text:
+            # NaNs only match themselves
+            return False
+        h = _digest(_FLAT_TAGS[type(obj)] + text.encode())
+        self._hashes[id(obj)] = (h, obj)
+        return True
+
+    def _leaf(self, obj) -> bytes:
+        cached = self._hashes.get(id(obj))
+        if cached is not None:
+            return cached[0]
+        obj_type = type(obj)
+        if obj_type is str:
+            h = self._strings.get(obj)
+            if h is None:
+                h = self._strings[obj] = _digest(b"Sstr:" + obj.encode("utf-8", "surrogatepass"))
+            return h
+        tag = _SCALAR_TAGS.get(obj_type)
+        if tag is not None and obj == obj:
+            return _digest(tag + (hex(obj) if obj_type is int else repr(obj)).encode())
+        if obj_type is np.ndarray and obj.dtype != object:
+            h = _digest(b"A%s:%r:%s" % (obj.dtype.str.encode(), obj.shape, obj.tobytes()))
+            self._hashes[id(obj)] = (h, obj)
+            return h
+        # Only the same object has the same hash
+        return _digest(b"I%d" % id(obj))
+
+    def _combine(self, obj, items) -> bytes:
+        if type(obj) is dict:
+            # Digests have a fixed size so the sorted (key, value) pairs are unambiguous
+            pairs = sorted([self._leaf(k) + h for k, h in items])
+            h = _digest(b"D:" + b"".join(pairs))
+        else:
+            h = _digest(b"C%d:" % id(type(obj)) + b"".join([h for _, h in items]))
+        self._hashes[id(obj)] = (h, obj)
+        return h
+
+
+ARRAY_DIFF_MAX_INDICES = 5
+"""The number of changed indices listed in the diff of two arrays."""
+
+
+def _is_array_pair(a, b) -> bool:
+    """Check if a and b are arrays that are compared whole instead of item by item."""
+    return (
+        type(a) is np.ndarray and type(b) is np.ndarray and a.dtype != object and b.dtype != object
+    )
+
+
+def _format_index(index: tuple) -> str:
+    index = tuple(int(i) for i in index)
+    return str(index[0] if len(index) == 1 else index)
+
+
+def _diff_arrays(a: np.ndarray, b: np.ndarray, rtol: float, atol: float) -> Optional[str]:
+    """Describe the differences between two arrays or None if they match.
+
+    Numeric arrays are compared with np.isclose and NaNs are equal. The description has
+    the number of changed values, the first changed indices and the max abs and rel
+    errors instead of one line per value.
+    """
+    parts = []
+    if a.dtype != b.dtype:
+        parts.append(f"dtype {a.dtype} -> {b.dtype}")
+    if a.shape != b.shape:
+        parts.append(f"shape {a.shape} -> {b.shape}")
+        return ", ".join(parts)
+    if a.ndim == 0:
+        if _is_changed(a.item(), b.item(), rtol, atol):
+            parts.append(f"{a} -> {b}")
+        return ", ".join(parts) or None
+    numeric = np.issubdtype(a.dtype, np.number) and np.issubdtype(b.dtype, np.number)
+    if numeric:
+        changed = ~np.isclose(a, b, rtol=rtol, atol=atol, equal_nan=True)
+    elif a.dtype.kind == b.dtype.kind:
+        changed = a != b
+    else:
+        return ", ".join(parts)
+    changed_at = np.flatnonzero(changed)
+    if len(changed_at):
+        indices = [
+            _format_index(np.unravel_index(flat_index, a.shape))
+            for flat_index in changed_at[:ARRAY_DIFF_MAX_INDICES]
+        ]
+        if len(changed_at) > ARRAY_DIFF_MAX_INDICES:
+            indices.append("...")
+        parts.append(f"{len(changed_at)} of {a.size} values changed at [{', '.join(indices)}]")
+        if numeric:
+            # Subtract as floats so unsigned ints do not wrap around
+            err_type = np.result_type(a.dtype, b.dtype, np.float64)
+            a_changed = a.ravel()[changed_at].astype(err_type)
+            b_changed = b.ravel()[changed_at].astype(err_type)
+            abs_err = np.abs(a_changed - b_changed)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rel_err = abs_err / np.abs(b_changed)
+            # fmax ignores the NaNs of values that are NaN on one side only
+            parts.append(f"max abs error {np.fmax.reduce(abs_err):.6g}")
+            parts.append(f"max rel error {np.fmax.reduce(rel_err):.6g}")
+    return ", ".join(parts) or None
+
+
+def _arrays_match(a: np.ndarray, b: np.ndarray, rtol: float, atol: float) -> bool:
+    if a.dtype != b.dtype or a.shape != b.shape:
+        return False
+    if np.issubdtype(a.dtype, np.number):
+        return bool(np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True))
+    return bool(np.array_equal(a, b))
+
+
+def _is_changed(a, b, rtol: float, atol: float) -> bool:
+    if a is b:
+        # As with ==, the same NaN is not a change
+        return False
+    if a is _MISSING:
+        a = None
+    if b is _MISSING:
+        b = None
+    if a is None or b is None or a is _MISSING_ITEM or b is _MISSING_ITEM:
+        return a is not b
+    if _is_array_pair(a, b):
+        return not _arrays_match(a, b, rtol, atol)
+    item_type = type(a)
+    kind = get_type_kind(item_type)
+    if kind.is_base or kind.is_base_type:
+        if (
+            isinstance(a, (float, np.floating))
+            and isinstance(b, (float, int, np.number))
+            and isclose(a, b, rel_tol=rtol, abs_tol=atol)
+        ):
+            return False
+        b_kind = get_type_kind(type(b))
+        return b_kind.is_iterable or b_kind.is_dictionary or b_kind.is_dataclass or a != b
+    if kind.is_dictionary or kind.is_iterable or kind.is_dataclass:
+        # Containers of different types
+        return True
+    if a != b:
+        raise ValueError(f"Invalid type{item_type}")
+    return False
+
+
+class ChangeOp(Enum):
+    ADD = "add"
+    REMOVE = "remove"
+    CHANGE = "change"
+
+
+class Change(NamedTuple):
+    """A difference found by `iter_changes`.
+
+    old is None for ChangeOp.ADD and new is None for ChangeOp.REMOVE.
+    """
+
+    path: Tuple[Any, ...]
+    op: ChangeOp
+    old: Any
+    new: Any
+
+    def format(self, field=None, rtol=1e-3, atol=0.0) -> str:
+        """Format the change as a "path: old -> new" string as returned by `diff`.
+
+        Changes to numeric arrays are summarised with the tolerances rtol and atol.
+        """
+        path = self.path if field is None else (field, *self.path)
+        if _is_array_pair(self.old, self.new):
+            values = _diff_arrays(self.old, self.new, rtol, atol)
+        else:
+            values = f"{self.old} -> {self.new}"
+        return f"{'.'.join(map(str, path))}: {values}"
+
+
+def _pair_id(node):
+    return id(node[0]), id(node[1])
+
+
+def iter_changes(
+    a,
+    b,
+    use_hashes=False,
+    baseline_hashes: Optional[SubtreeHashes] = None,
+    rtol=1e-3,
+    atol=0.0,
+) -> Iterator[Change]:
+    """Iterate over the differences between a and b as `Change` records.
+
+    Dicts, dataclasses and iterables are compared recursively with an explicit stack.
+    Floats are compared with a tolerance of rtol and atol. Numeric numpy arrays are
+    compared whole with np.isclose and are changed as one value. None and missing
+    values are treated the same so a key that is None on one side is not a change.
+
+    Matching subtrees are skipped. By default they are found with == and subtrees that
+    are too deep for == are compared by their structural hashes. With hashes each
+    subtree is hashed once instead of being compared again at every level above a
+    change, this is faster for deep documents and when the hashes of a are memoised.
+
+    Args:
+        a: The baseline.
+        b: The object to compare with the baseline.
+        use_hashes: Find matching subtrees with their structural hashes instead of ==.
+            See `SubtreeHashes`.
+        baseline_hashes: The memoised hashes of a. Implies use_hashes.
+        rtol: The relative tolerance used to compare floats and numeric arrays.
+        atol: The absolute tolerance used to compare floats and numeric arrays.
+    """
+    use_hashes = use_hashes or baseline_hashes is not None
+    a_hashes = baseline_hashes if baseline_hashes is not None else SubtreeHashes()
+    b_hashes = SubtreeHashes()
+
+    def is_same(va, vb) -> bool:
+        if va is vb:
+            return True
+        if not use_hashes and type(va) is not np.ndarray:
+            try:
+                return bool(va == vb)
+            except (RecursionError, ValueError):
+                # Too deep or ambiguous (numpy arrays) so fall back to the hashes
                 pass
-            else:
-                changes.append(f"{field}: {a} -> {b}")
-        elif is_dictionary(item_type):
-            changes += diff_dicts(field, a, b)
-        elif is_iterable(item_type):
-            changes += flatten_list(
-                [diff(f"{field}.{i}", va, vb) for i, (va, vb) in enumerate(zip(a, b))]
-            )
-        elif is_dataclass(item_type):
-            changes += diff_dicts(field, asdict(a), asdict(b))
+        return a_hashes.get(va) == b_hashes.get(vb)
+
+    nodes = walk(
+        (a, b),
+        lambda node: _diff_children(node, is_same),
+        detect_cycles=True,
+        node_id=_pair_id,
+        root_path=None,
+        extend_path=link_path,
+    )
+    for path, (va, vb), is_leaf in nodes:
+        if not is_leaf or not _is_changed(va, vb, rtol, atol):
+            continue
+        if type(va) is _Missing:
+            yield Change(unlink_path(path), ChangeOp.ADD, None, vb)
+        elif type(vb) is _Missing:
+            yield Change(unlink_path(path), ChangeOp.REMOVE, va, None)
         else:
-            raise ValueError(f"Invalid type{item_type}")
-    return changes
+            yield Change(unlink_path(path), ChangeOp.CHANGE, va, vb)
+
+
+def iter_diff(
+    field,
+    a,
+    b,
+    use_hashes=False,
+    baseline_hashes: Optional[SubtreeHashes] = None,
+    rtol=1e-3,
+    atol=0.0,
+) -> Iterator[str]:
+    """Iterate over the differences between a and b as "path: a -> b" strings.
+
+    The documents are only walked as far as needed so stop iterating to exit early.
+    See `diff`.
+    """
+    for change in iter_changes(a, b, use_hashes, baseline_hashes, rtol, atol):
+        yield change.format(field, rtol, atol)
+
+
+def diff(
+    field,
+    a,
+    b,
+    use_hashes=False,
+    baseline_hashes: Optional[SubtreeHashes] = None,
+    rtol=1e-3,
+    atol=0.0,
+    max_changes: Optional[int] = None,
+) -> List[str]:
+    """Get the differences between a and b as "path: a -> b" strings.
+
+    Changes to numeric arrays are summarised in one line with the number of changed
+    values, the first changed indices and the max errors. Stops after max_changes
+    differences if it is set.
+    See `iter_changes` for the other arguments.
+    """
+    changes = iter_diff(field, a, b, use_hashes, baseline_hashes, rtol, atol)
+    return list(islice(changes, max_changes))
+
+
+def has_differences(a, b, rtol=1e-3, atol=0.0) -> bool:
+    """Check if a and b differ. Stops at the first difference.
 
+    Uses the same rules as `diff`.
+    """
+    return next(iter_changes(a, b, rtol=rtol, atol=atol), None) is not None
 
-def diff_dicts(field, a, b):
-    changes = []
-    a_is_dict = is_dictionary(a)
-    b_is_dict = is_dictionary(b)
 
-    if not a_is_dict and b_is_dict:
-        changes.append(f"{field}: {a} -> {b}")
+def diff_dicts(
+    field,
+    a,
+    b,
+    use_hashes=False,
+    baseline_hashes: Optional[SubtreeHashes] = None,
+    rtol=1e-3,
+    atol=0.0,
+    max_changes: Optional[int] = None,
+):
+    if not isinstance(a, dict) or not isinstance(b, dict):
+        return [f"{field}: {a} -> {b}"][:max_changes]
+    return diff(field, a, b, use_hashes, baseline_hashes, rtol, atol, max_changes)
 
-    if a_is_dict and not b_is_dict:
-        changes.append(f"{field}: {a} -> {b}")
 
-    for k in set(list(a.keys()) + list(b.keys())):
-        va = a.get(k, None)
-        vb = b.get(k, None)
-        changes += diff(f"{field}.{k}", va, vb)
-    return changes
+def _copy_container(obj):
+    if isinstance(obj, (dict, list, np.ndarray)):
+        return obj.copy()
+    if type(obj) is tuple:
+        # Patched as a list and converted back at the end
+        return list(obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return copy(obj)
+    raise TypeError(f"Cannot patch {type(obj)}")
+
+
+def _get_item(obj, key):
+    if is_dataclass(obj):
+        return getattr(obj, key)
+    return obj[key]
+
+
+def _set_item(obj, key, value):
+    if is_dataclass(obj):
+        # obj is our copy so frozen dataclasses can be set too
+        object.__setattr__(obj, key, value)
+    else:
+        obj[key] = value
+
+
+def apply_patch(obj, changes: Iterable[Change]):
+    """Apply changes from `iter_changes` to obj and return the patched object.
+
+    obj is not modified. The dicts, lists, tuples and dataclasses on the paths of the
+    changes are copied and everything else is shared with obj. Items are removed from lists
+    last and from the highest index so the indices of all changes refer to the
+    original lists.
+
+    ```
+    changes = list(iter_changes(baseline, config))
+    assert diff("config", apply_patch(baseline, changes), config) == []
+    ```
+    """
+    root: Dict[Any, Any] = {None: obj}
+    copies: Dict[Tuple[Any, ...], Any] = {}
+    list_removals = []
+    tuples = []
+    for change in changes:
+        path = (None, *change.path)
+        parent = root
+        for depth in range(1, len(path)):
+            node = copies.get(path[:depth])
+            if node is None:
+                original = _get_item(parent, path[depth - 1])
+                node = _copy_container(original)
+                _set_item(parent, path[depth - 1], node)
+                copies[path[:depth]] = node
+                if type(original) is tuple:
+                    tuples.append(path[:depth])
+            parent = node
+        key = path[-1]
+        if change.op is ChangeOp.CHANGE or isinstance(parent, dict) or is_dataclass(parent):
+            if change.op is ChangeOp.REMOVE and isinstance(parent, dict):
+                del parent[key]
+            else:
+                _set_item(parent, key, change.new)
+        elif not isinstance(parent, list):
+            raise TypeError(f"Cannot {change.op.value} items of {type(parent)}")
+        elif change.op is ChangeOp.REMOVE:
+            list_removals.append((key, parent))
+        else:
+            parent.insert(key, change.new)
+    for key, parent in sorted(list_removals, key=lambda removal: removal[0], reverse=True):
+        del parent[key]
+    # Children before parents so nested tuples are converted first
+    for path in sorted(tuples, key=len, reverse=True):
+        parent = copies.get(path[:-1], root)
+        _set_item(parent, path[-1], tuple(copies[path]))
+    return root[None]
@@ -0,0 +1,191 @@
+"""Iterative traversal of nested documents.
+
+The nested walks in data_helpers are built on `walk` and `fold`. Both use an explicit
+stack so the depth of a document is not limited by the recursion limit.
+
+What counts as a container is decided by a `children` function that returns the
+(key, child) pairs of a node or None if the node is a leaf. Nodes do not have to be the
+documents themselves, e.g. `diff` walks (a, b) pairs of values.
+"""
+
+from dataclasses import fields, is_dataclass
+from typing import Any, Callable, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+Path = Tuple[Any, ...]
+Children = Optional[Iterable[Tuple[Any, Any]]]
+
+CYCLE_CHECK_DEPTH = 64
+"""Depth from which containers are tracked to detect cycles.
+
+A cycle repeats its containers at every depth so it is still found, only further down,
+and shallow documents do not pay for the tracking.
+"""
+
+
+def iter_children(obj) -> Children:
+    """Get the (key, value) children of a container or None if obj is a leaf.
+
+    Dicts, lists, tuples, named tuples and dataclass instances are containers.
+    Numpy arrays are containers if they are object arrays or have more than one
+    dimension, the items of numeric arrays are leaves.
+    """
+    if isinstance(obj, dict):
+        return obj.items()
+    if isinstance(obj, list):
+        return enumerate(obj)
+    if isinstance(obj, np.ndarray):
+        if obj.dtype == object or obj.ndim > 1:
+            return enumerate(obj)
+        return None
+    if isinstance(obj, tuple):
+        # Named tuples are keyed by their field names
+        return enumerate(obj) if type(obj) is tuple else zip(obj._fields, obj)
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return ((f.name, getattr(obj, f.name)) for f in fields(obj))
+    return None
+
+
+def link_path(parent, key):
+    """An `extend_path` for `walk` that links to the parent path instead of copying it.
+
+    Extending a path is O(1) so use this with `root_path=None` for deep documents where
+    only a few paths are needed. Convert a linked path to a tuple of keys with
+    `unlink_path`.
+    """
+    return parent, key
+
+
+def unlink_path(path) -> Path:
+    """Convert a path built with `link_path` to a tuple of keys."""
+    keys = []
+    while path is not None:
+        path, k = path
+        keys.append(k)
+    return tuple(reversed(keys))
+
+
+def _cycle_error(path) -> ValueError:
+    if isinstance(path, tuple):
+        path = ".".join(map(str, path))
+    return ValueError(f"Cycle detected at {path}")
+
+
+def walk(
+    root,
+    children: Callable[[Any], Children] = iter_children,
+    prune: Optional[Callable[[Any, Any], bool]] = None,
+    detect_cycles=False,
+    node_id: Callable[[Any], Hashable] = id,
+    root_path: Any = (),
+    extend_path: Optional[Callable[[Any, Any], Any]] = None,
+) -> Iterator[Tuple[Any, Any, bool]]:
+    """Iterate over the nodes of a document depth first as (path, node, is_leaf).
+
+    Nodes are yielded in pre-order and in the order of their keys, the same order as
+    a recursive walk. The root is yielded first with an empty path. Stop iterating to
+    exit early.
+
+    Args:
+        root: The document.
+        children: Returns the (key, child) pairs of a node or None if it is a leaf.
+        prune: If prune(path, node) is True the node is yielded but not descended into.
+        detect_cycles: Raise a ValueError if a container is its own ancestor.
+            See `CYCLE_CHECK_DEPTH`.
+        node_id: The identity of a node used to detect cycles.
+        root_path: The path of the root.
+        extend_path: Get the path of a child from the path of its parent and its key.
+            Defaults to a tuple of keys. Use to build e.g. dot notation paths
+            incrementally.
+
+    Yields:
+        Tuple[Any, Any, bool]: The path, the node and if it is a leaf.
+    """
+    kids = children(root)
+    yield root_path, root, kids is None
+    if kids is None or (prune is not None and prune(root_path, root)):
+        return
+    on_path: Set[Hashable] = set()
+    stack = [(root_path, iter(kids), None)]
+    push = stack.append
+    while stack:
+        path, items, nid = stack[-1]
+        for k, v in items:
+            child_path = path + (k,) if extend_path is None else extend_path(path, k)
+            kids = children(v)
+            if kids is None:
+                yield child_path, v, True
+                continue
+            yield child_path, v, False
+            if prune is not None and prune(child_path, v):
+                continue
+            child_id = None
+            if detect_cycles and len(stack) >= CYCLE_CHECK_DEPTH:
+                child_id = node_id(v)
+                if child_id in on_path:
+                    if extend_path is link_path:
+                        child_path = unlink_path(child_path)
+                    raise _cycle_error(child_path)
+                on_path.add(child_id)
+            push((child_path, iter(kids), child_id))
+            break
+        else:
+            stack.pop()
+            if nid is not None:
+                on_path.discard(nid)
+
+
+def fold(
+    root,
+    children: Callable[[Any], Children],
+    leaf: Callable[[Any], Any],
+    combine: Callable[[Any, List[Tuple[Any, Any]]], Any],
+    detect_cycles=False,
+    node_id: Callable[[Any], Hashable] = id,
+):
+    """Reduce a document bottom up.
+
+    The result of a leaf is `leaf(node)` and the result of a container is
+    `combine(node, [(key, child result), ...])`. Children are reduced before their parent
+    so this is used to build new documents, e.g. `unpack` and `merge_objects`.
+
+    Args:
+        root: The document.
+        children: Returns the (key, child) pairs of a node or None if it is a leaf.
+        leaf: Get the result for a leaf.
+        combine: Get the result for a container from the results of its children.
+        detect_cycles: Raise a ValueError if a container is its own ancestor.
+            See `CYCLE_CHECK_DEPTH`.
+        node_id: The identity of a node used to detect cycles.
+    """
+    kids = children(root)
+    if kids is None:
+        return leaf(root)
+    on_path: Set[Hashable] = set()
+    # frames are (key, node, items iterator, child results, node id)
+    stack: List[Tuple[Any, Any, Iterator, list, Any]] = [(None, root, iter(kids), [], None)]
+    push = stack.append
+    while True:
+        key, node, items, results, nid = stack[-1]
+        for k, v in items:
+            kids = children(v)
+            if kids is None:
+                results.append((k, leaf(v)))
+                continue
+            child_id = None
+            if detect_cycles and len(stack) >= CYCLE_CHECK_DEPTH:
+                child_id = node_id(v)
+                if child_id in on_path:
+                    raise _cycle_error(tuple(frame[0] for frame in stack[1:]) + (k,))
+                on_path.add(child_id)
+            push((k, v, iter(kids), [], child_id))
+            break
+        else:
+            stack.pop()
+            if nid is not None:
+                on_path.discard(nid)
+            out = combine(node, results)
+            if not stack:
+                return out
+            stack[-1][3].append((key, out))
@@ -0,0 +1,76 @@
+from copy import deepcopy
+
+import pytest
+
+from data_helpers.cls_parsing import dict_to_cls, dict_to_cls_many, rgetattr, rsetattr, unpack
+from tests.benchmarks.workloads import (
+    Record,
+    make_deep_path,
+    make_nested_dict,
+    make_records,
+    make_state,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="dict_to_cls")
+@pytest.mark.parametrize("list_length", [0, 10, 100])
+@pytest.mark.parametrize("compiled", [False, True])
+def test_dict_to_cls(benchmark, list_length, compiled):
+    data = make_records(1, list_length)[0]
+    out = benchmark(dict_to_cls, data, Record, compiled=compiled)
+    assert len(out.items) == list_length
+
+
+@pytest.mark.benchmark(group="dict_to_cls_many")
+@pytest.mark.parametrize("n", [10, 1000, 10000])
+@pytest.mark.parametrize("compiled", [False, True])
+def test_dict_to_cls_many(benchmark, n, compiled):
+    data = make_records(n)
+    out = benchmark(dict_to_cls_many, data, Record, compiled=compiled)
+    assert len(out) == n
+
+
+@pytest.mark.benchmark(group="rgetattr")
+@pytest.mark.parametrize("depth", [1, 8, 32])
+def test_rgetattr(benchmark, depth):
+    data = make_nested_dict(depth, 1)
+    out = benchmark(rgetattr, data, make_deep_path(depth))
+    assert out == 1
+
+
+@pytest.mark.benchmark(group="rsetattr")
+@pytest.mark.parametrize("depth", [1, 8, 32])
+def test_rsetattr(benchmark, depth):
+    data = make_nested_dict(depth, 1)
+    out = benchmark(rsetattr, data, make_deep_path(depth), 2)
+    assert rgetattr(out, make_deep_path(depth)) == 2
+
+
+@pytest.mark.benchmark(group="rsetattr")
+@pytest.mark.parametrize("depth", [2, 8])
+def test_rsetattr_create_missing(benchmark, depth):
+    def run():
+        return rsetattr({}, make_deep_path(depth), 2, create_missing_dicts=True)
+
+    out = benchmark(run)
+    assert rgetattr(out, make_deep_path(depth)) == 2
+
+
+@pytest.mark.benchmark(group="unpack")
+@pytest.mark.parametrize("array_size", [10, 10000, 1000000])
+@pytest.mark.parametrize("list_length", [10, 1000])
+def test_unpack(benchmark, array_size, list_length):
+    state = make_state(array_size, list_length)
+    out = benchmark(unpack, state)
+    assert len(out["arr"]) == array_size
+
+
+@pytest.mark.benchmark(group="unpack")
+@pytest.mark.parametrize("depth", [2, 6])
+@pytest.mark.parametrize("breadth", [2, 6])
+def test_unpack_nested_dict(benchmark, depth, breadth):
+    data = make_nested_dict(depth, breadth, list_length=4)
+    out = benchmark(unpack, data)
+    assert out == deepcopy(data)
@@ -0,0 +1,25 @@
+import csv
+
+import pytest
+
+from data_helpers.data_loaders import csv_loader
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(params=[100, 10000, 100000])
+def csv_file(request, tmp_path):
+    rows = request.param
+    file_path = tmp_path / "data.csv"
+    with open(file_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["uid", "name", "value", "flag"])
+        writer.writerows([i, f"name_{i}", i / 3, i % 2] for i in range(rows))
+    return file_path, rows
+
+
+@pytest.mark.benchmark(group="csv_loader")
+def test_csv_loader(benchmark, csv_file):
+    file_path, rows = csv_file
+    out = benchmark(csv_loader, file_path)
+    assert len(out) == rows
@@ -0,0 +1,70 @@
+import pytest
+
+from data_helpers.dictionary_helpers import (
+    ListMergeMethods,
+    find_all_keys,
+    flatten_dict,
+    merge_dataclasses,
+    merge_dictionaries,
+)
+from tests.benchmarks.workloads import make_config, make_nested_dict, make_nested_list_dict
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="merge_dictionaries")
+@pytest.mark.parametrize("depth", [2, 4, 6])
+@pytest.mark.parametrize("breadth", [2, 4])
+@pytest.mark.parametrize("list_length", [0, 10])
+def test_merge_dictionaries(benchmark, depth, breadth, list_length):
+    a = make_nested_dict(depth, breadth, list_length)
+    b = make_nested_dict(depth, 1, list_length, leaf=2)
+    out = benchmark(merge_dictionaries, a, b)
+    assert len(out) == breadth
+
+
+@pytest.mark.benchmark(group="merge_dictionaries")
+@pytest.mark.parametrize("depth", [2, 4])
+@pytest.mark.parametrize("list_length", [10, 100])
+def test_merge_dictionaries_zip(benchmark, depth, list_length):
+    a = make_nested_dict(depth, 2, list_length)
+    b = make_nested_dict(depth, 2, list_length, leaf=2)
+    out = benchmark(merge_dictionaries, a, b, ListMergeMethods.ZIP)
+    assert len(out) == 2
+
+
+@pytest.mark.benchmark(group="merge_dataclasses")
+@pytest.mark.parametrize("breadth", [2, 10, 50])
+@pytest.mark.parametrize("list_length", [10, 10000])
+def test_merge_dataclasses(benchmark, breadth, list_length):
+    a = make_config(breadth, list_length)
+    b = make_config(1, 1)
+    out = benchmark(merge_dataclasses, a, b)
+    assert out.values == [0]
+
+
+@pytest.mark.benchmark(group="flatten_dict")
+@pytest.mark.parametrize("depth", [2, 4, 6])
+@pytest.mark.parametrize("breadth", [2, 4])
+@pytest.mark.parametrize("list_length", [0, 10])
+def test_flatten_dict(benchmark, depth, breadth, list_length):
+    data = make_nested_dict(depth, breadth, list_length)
+    out = benchmark(flatten_dict, data)
+    assert len(out) == breadth**depth * max(list_length, 1)
+
+
+@pytest.mark.benchmark(group="find_all_keys")
+@pytest.mark.parametrize("depth", [2, 4, 6])
+@pytest.mark.parametrize("breadth", [2, 4])
+def test_find_all_keys(benchmark, depth, breadth):
+    data = make_nested_dict(depth, breadth)
+    out = benchmark(find_all_keys, data, "k1")
+    assert len(out) > 0
+
+
+@pytest.mark.benchmark(group="find_all_keys")
+@pytest.mark.parametrize("list_length", [10, 1000])
+def test_find_all_keys_in_lists(benchmark, list_length):
+    data = make_nested_list_dict(list_length, 4)
+    out = benchmark(find_all_keys, data, "bar")
+    assert len(out) == list_length * 4
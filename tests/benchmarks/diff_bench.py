@@ -0,0 +1,89 @@
+from copy import deepcopy
+
+import numpy as np
+
+import pytest
+
+from data_helpers.cls_parsing import rsetattr
+from data_helpers.diff import SubtreeHashes, diff, diff_dicts, has_differences
+from tests.benchmarks.workloads import make_config, make_deep_path, make_nested_dict
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("depth", [2, 4, 6])
+@pytest.mark.parametrize("breadth", [2, 4])
+@pytest.mark.parametrize("list_length", [0, 10])
+def test_diff_dicts_single_change(benchmark, depth, breadth, list_length):
+    a = make_nested_dict(depth, breadth, list_length)
+    b = deepcopy(a)
+    rsetattr(b, make_deep_path(depth), "changed")
+    out = benchmark(diff_dicts, "root", a, b)
+    assert len(out) >= 1
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("depth", [2, 4, 6])
+def test_diff_dicts_identical(benchmark, depth):
+    a = make_nested_dict(depth, 4)
+    b = deepcopy(a)
+    out = benchmark(diff_dicts, "root", a, b)
+    assert out == []
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("list_length", [10, 10000])
+def test_diff_dataclasses(benchmark, list_length):
+    a = make_config(4, list_length)
+    b = make_config(4, list_length)
+    b.values[-1] = -1
+    out = benchmark(diff, "root", a, b)
+    assert len(out) == 1
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("use_hashes", [False, True])
+def test_diff_dicts_deep_single_change(benchmark, use_hashes):
+    a = b = None
+    for i in range(5000):
+        a = {"k": a, "v": [i]}
+        b = {"k": b, "v": [i]}
+    b["v"] = "changed"
+    out = benchmark(diff_dicts, "root", a, b, use_hashes)
+    assert len(out) == 1
+
+
+@pytest.mark.benchmark(group="diff")
+def test_diff_dicts_memoised_baseline(benchmark):
+    a = make_nested_dict(6, 4, 10)
+    b = deepcopy(a)
+    rsetattr(b, make_deep_path(6), "changed")
+    baseline = SubtreeHashes(a)
+    out = benchmark(diff_dicts, "root", a, b, baseline_hashes=baseline)
+    assert len(out) == 1
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("size", [1000, 1000000])
+def test_diff_arrays(benchmark, size):
+    a = {"output": np.linspace(0, 1, size)}
+    b = {"output": a["output"] * 1.01}
+    out = benchmark(diff_dicts, "root", a, b)
+    assert len(out) == 1
+
+
+@pytest.mark.benchmark(group="diff")
+@pytest.mark.parametrize("max_changes", [None, 1])
+def test_diff_dicts_many_changes(benchmark, max_changes):
+    a = make_nested_dict(6, 4)
+    b = make_nested_dict(6, 4, leaf=2)
+    out = benchmark(diff_dicts, "root", a, b, max_changes=max_changes)
+    assert len(out) == (max_changes or 4 ** 6)
+
+
+@pytest.mark.benchmark(group="diff")
+def test_has_differences(benchmark):
+    a = make_nested_dict(6, 4)
+    b = make_nested_dict(6, 4, leaf=2)
+    assert benchmark(has_differences, a, b)
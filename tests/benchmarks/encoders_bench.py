@@ -0,0 +1,33 @@
+import json
+
+import numpy as np
+import pytest
+
+from data_helpers.encoders import AdvancedJsonEncoder
+from tests.benchmarks.workloads import make_config, make_nested_dict, make_state
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="AdvancedJsonEncoder")
+@pytest.mark.parametrize("array_size", [10, 10000, 1000000])
+def test_encode_array(benchmark, array_size):
+    data = {"arr": np.arange(array_size, dtype=np.float64), "scalar": np.float32(1)}
+    out = benchmark(json.dumps, data, cls=AdvancedJsonEncoder)
+    assert out.startswith("{")
+
+
+@pytest.mark.benchmark(group="AdvancedJsonEncoder")
+@pytest.mark.parametrize("list_length", [10, 1000])
+def test_encode_dataclasses(benchmark, list_length):
+    data = [make_config(4, 10) for _ in range(list_length)]
+    out = benchmark(json.dumps, data, cls=AdvancedJsonEncoder)
+    assert out.startswith("[")
+
+
+@pytest.mark.benchmark(group="AdvancedJsonEncoder")
+@pytest.mark.parametrize("array_size", [10, 10000])
+def test_encode_state(benchmark, array_size):
+    data = {"state": make_state(array_size, 10)._asdict(), "nested": make_nested_dict(4, 4)}
+    out = benchmark(json.dumps, data, cls=AdvancedJsonEncoder)
+    assert out.startswith("{")
@@ -0,0 +1,86 @@
+"""Synthetic workloads shared by the benchmark suite."""
+from dataclasses import dataclass, field
+from typing import List, NamedTuple
+
+import numpy as np
+
+
+def make_nested_dict(depth: int, breadth: int, list_length: int = 0, leaf=1) -> dict:
+    """Nested dict with `breadth` keys per level. Leaves are ints or lists of ints."""
+    if depth == 0:
+        return list(range(list_length)) if list_length else leaf
+    return {
+        f"k{i}": make_nested_dict(depth - 1, breadth, list_length, leaf) for i in range(breadth)
+    }
+
+
+def make_deep_path(depth: int) -> str:
+    return ".".join(["k0"] * depth)
+
+
+def make_nested_list_dict(length: int, breadth: int) -> dict:
+    """Dict containing a list of small dicts."""
+    return {"items": [{f"k{j}": {"foo": j, "bar": [j, j]} for j in range(breadth)}
+                      for _ in range(length)]}
+
+
+@dataclass
+class Inner:
+    a: int = 0
+    b: str = ""
+    c: float = 0.0
+
+
+@dataclass
+class Record:
+    uid: int = 0
+    name: str = ""
+    value: float = 0.0
+    inner: Inner = field(default_factory=Inner)
+    items: List[Inner] = field(default_factory=list)
+
+
+def make_records(n: int, list_length: int = 3) -> List[dict]:
+    return [
+        {
+            "uid": i,
+            "name": f"record_{i}",
+            "value": i / 3,
+            "inner": {"a": i, "b": "x", "c": 1.5},
+            "items": [{"a": j, "b": "y", "c": 0.5} for j in range(list_length)],
+        }
+        for i in range(n)
+    ]
+
+
+@dataclass
+class Config:
+    foo: int = 0
+    bar: str = ""
+    nested: dict = field(default_factory=dict)
+    values: List[int] = field(default_factory=list)
+
+
+def make_config(breadth: int, list_length: int) -> Config:
+    return Config(
+        foo=breadth,
+        bar="config",
+        nested=make_nested_dict(2, breadth),
+        values=list(range(list_length)),
+    )
+
+
+class State(NamedTuple):
+    uid: int
+    arr: np.ndarray
+    records: List[Inner]
+    meta: dict
+
+
+def make_state(array_size: int, list_length: int) -> State:
+    return State(
+        uid=1,
+        arr=np.arange(array_size, dtype=np.float64),
+        records=[Inner(i, "x", i / 2) for i in range(list_length)],
+        meta=make_nested_dict(2, 4),
+    )
@@ -1,7 +1,8 @@
 from dataclasses import is_dataclass, dataclass, field
 import inspect
 from typing import get_args, List, Optional
-from data_helpers.cls_parsing import is_enum, is_iterable
+from data_helpers.cls_parsing import is_enum
+from data_helpers.comparisons import is_iterable
 import json
 import pytest
 from enum import Enum
@@ -2,13 +2,19 @@ import typing
 import sys
 import numpy as np
 from enum import Enum
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, make_dataclass
 from typing import NamedTuple, List, Optional, Sequence, Tuple, Union, TypeVar
 import pytest
 
+from data_helpers import cls_parsing
+
 from data_helpers.cls_parsing import (
     dict_to_cls,
+    dict_to_cls_many,
+    compile_parser,
+    dict_to_columns,
     _replace_recursive,
+    replace_recursive_many,
     get_parser,
     get_val_from_tuple,
     parse_base_val,
@@ -16,8 +22,15 @@ from data_helpers.cls_parsing import (
     parse_enum_val,
     parse_list_val,
     rsetattr,
+    rsetattr_many,
     rgetattr,
+    rdelattr,
+    compile_path,
+    unpack,
     check_types,
+    clear_parse_plan_cache,
+    get_parse_plan,
+    warm_parse_plan_cache,
 )
 
 if sys.version_info <= (3, 9):
@@ -436,6 +449,185 @@ def test_dict_to_cls_invalid():
         dict_to_cls(d3, Wrap, strict=True)
 
 
+class TestParsePlan:
+
+    def test_plan_is_cached_per_class(self):
+        clear_parse_plan_cache()
+        plan = get_parse_plan(DemoDataclass)
+        assert get_parse_plan(DemoDataclass) is plan
+        assert plan.field_names == {"foo", "bar", "number"}
+        assert [f.parser for f in plan.fields] == [parse_base_val] * 3
+
+    def test_can_warm_and_clear_cache(self, mocker):
+        clear_parse_plan_cache()
+        spy = mocker.spy(cls_parsing, "get_parser")
+        warm_parse_plan_cache(DemoDataclass)
+        calls_after_warm = spy.call_count
+        assert dict_to_cls({"foo": 1}, DemoDataclass) == DemoDataclass(1)
+        assert dict_to_cls({"foo": 2}, DemoDataclass) == DemoDataclass(2)
+        assert spy.call_count == calls_after_warm
+        clear_parse_plan_cache(DemoDataclass)
+        dict_to_cls({"foo": 1}, DemoDataclass)
+        assert spy.call_count > calls_after_warm
+
+    def test_invalid_field_type_only_raises_when_present(self):
+        class A(NamedTuple):
+            foo: int = 1
+            bar: "UnknownType" = None  # type: ignore # noqa: F821
+
+        assert dict_to_cls({"foo": 2}, A) == A(2)
+        with pytest.raises(TypeError):
+            dict_to_cls({"bar": 2}, A)
+
+
+@dataclass
+class CompiledInner:
+    a: int = 0
+    b: str = ""
+
+
+@dataclass
+class CompiledOuter:
+    inner: CompiledInner = field(default_factory=CompiledInner)
+    optional_inner: Optional[CompiledInner] = None
+    inner_list: List[CompiledInner] = field(default_factory=list)
+    value: float = 0.0
+    enum_val: DemoEnum = DemoEnum.DEFAULT
+
+
+class TestCompiledParser:
+
+    def test_matches_generic_parser(self):
+        data = {
+            "inner": {"a": "3", "b": "x"},
+            "optional_inner": {"a": 1},
+            "inner_list": [{"a": 1}, {"b": "y"}, {}],
+            "value": 1,
+            "enum_val": "default",
+        }
+        out = dict_to_cls(data, CompiledOuter, compiled=True)
+        assert out == dict_to_cls(data, CompiledOuter)
+        assert out.inner == CompiledInner(3, "x")
+        assert out.inner_list[2] == CompiledInner()
+        assert isinstance(out.value, float)
+        out = dict_to_cls({"optional_inner": None}, CompiledOuter, compiled=True)
+        assert out.optional_inner is None
+
+    def test_compiles_named_tuple(self):
+        class A(NamedTuple):
+            foo: int = 1
+            bar: str = "hello"
+
+        parser = compile_parser(A)
+        assert parser.__name__ == "__dict_to_A"
+        assert parser({"foo": "2"}) == A(2)
+        assert parser(None) is None
+
+    def test_class_name_is_not_an_identifier(self):
+        Cls = make_dataclass("my-cls", [("a", int, 0)])
+        assert dict_to_cls({"a": "2"}, Cls, compiled=True) == Cls(2)
+        assert compile_parser(Cls).__name__ == "__dict_to_my-cls"
+
+    def test_strict_mode(self):
+        with pytest.raises(Exception) as e:
+            dict_to_cls({"foo": 1, "invalid": 2}, DemoDataclass, strict=True, compiled=True)
+        assert "invalid must be in DemoDataclass fields" in str(e)
+
+    def test_can_parse_many_compiled(self):
+        data = [{"foo": i} for i in range(3)]
+        out = dict_to_cls_many(data, DemoDataclass, compiled=True)
+        assert out == [DemoDataclass(i) for i in range(3)]
+
+
+@dataclass
+class ColumnRecord:
+    i: int
+    x: float = 0.0
+    flag: bool = False
+    name: str = ""
+    enum_val: DemoEnum = DemoEnum.DEFAULT
+    maybe: Optional[float] = None
+
+
+class TestDictToColumns:
+
+    def test_parses_columns(self):
+        data = [
+            {"i": 1, "x": 1.5, "flag": True, "name": "a"},
+            {"i": "2", "x": "2", "name": "bcd", "enum_val": "default", "maybe": 3.0},
+        ]
+        out = dict_to_columns(data, ColumnRecord)
+        assert list(out.keys()) == ["i", "x", "flag", "name", "enum_val", "maybe"]
+        assert out["i"].dtype == np.int64
+        assert out["i"].tolist() == [1, 2]
+        assert out["x"].dtype == np.float64
+        assert out["x"].tolist() == [1.5, 2.0]
+        assert out["flag"].tolist() == [True, False]
+        assert out["name"].tolist() == ["a", "bcd"]
+        assert out["enum_val"].tolist() == ["default", "default"]
+        assert np.isnan(out["maybe"][0]) and out["maybe"][1] == 3.0
+
+    def test_structured_array(self):
+        data = [{"i": 1, "name": "a"}, {"i": 2, "name": "bb"}]
+        out = dict_to_columns(data, ColumnRecord, structured=True)
+        assert out.shape == (2,)
+        assert out["i"].tolist() == [1, 2]
+        assert out["name"].tolist() == ["a", "bb"]
+        assert out[1]["name"] == "bb"
+
+    def test_missing_required_field(self):
+        with pytest.raises(ValueError):
+            dict_to_columns([{"x": 1.0}], ColumnRecord)
+
+    def test_invalid_values(self):
+        with pytest.raises(TypeError):
+            dict_to_columns([{"i": "abc"}], ColumnRecord)
+        with pytest.raises(TypeError):
+            dict_to_columns([{"i": 1, "enum_val": "invalid"}], ColumnRecord)
+        with pytest.raises(ValueError):
+            dict_to_columns([{"i": None}], ColumnRecord)
+
+    def test_nested_fields_are_not_supported(self):
+        with pytest.raises(TypeError):
+            dict_to_columns([{"inner": {}}], CompiledOuter)
+
+
+class TestDictToClsMany:
+
+    def test_parses_all_records(self):
+        data = [{"foo": i, "bar": str(i)} for i in range(5)]
+        out = dict_to_cls_many(data, DemoDataclass)
+        assert out == [DemoDataclass(i, str(i)) for i in range(5)]
+
+    def test_can_return_generator(self):
+        data = ({"foo": i} for i in range(3))
+        out = dict_to_cls_many(data, DemoDataclass, lazy=True)
+        assert not isinstance(out, list)
+        assert list(out) == [DemoDataclass(0), DemoDataclass(1), DemoDataclass(2)]
+
+    def test_can_parse_with_workers(self):
+        data = [{"foo": i} for i in range(25)]
+        out = dict_to_cls_many(data, DemoDataclass, workers=2, chunk_size=4)
+        assert out == [DemoDataclass(i) for i in range(25)]
+
+    def test_workers_read_data_lazily(self):
+        read = []
+
+        def records():
+            for i in range(100):
+                read.append(i)
+                yield {"foo": i}
+
+        out = dict_to_cls_many(records(), DemoDataclass, workers=2, chunk_size=4, lazy=True)
+        assert next(out) == DemoDataclass(0)
+        assert len(read) <= 2 * 2 * 4 + 4
+        assert list(out) == [DemoDataclass(i) for i in range(1, 100)]
+
+    def test_strict_errors_are_raised(self):
+        with pytest.raises(Exception):
+            dict_to_cls_many([{"foo": 1}, {"invalid": 1}], DemoDataclass, strict=True)
+
+
 class TestGetParser():
 
     def test_get_parser_Union(self):
@@ -548,6 +740,61 @@ def test_replace_recursive_with_list():
     assert updated_wrap_b.b[0].foo == 'world' # type: ignore
 
 
+class TestReplaceRecursiveStructuralSharing:
+
+    class B(NamedTuple):
+        foo: str = 'hello'
+
+    class A(NamedTuple):
+        lat: float = 2
+        lon: float = 3
+
+    @dataclass
+    class Wrap:
+        a: "TestReplaceRecursiveStructuralSharing.A"
+        b: List["TestReplaceRecursiveStructuralSharing.B"]
+        d: dict
+        arr: np.ndarray
+
+    def get_data(self):
+        return self.Wrap(
+            a=self.A(),
+            b=[self.B(), self.B()],
+            d={"big": list(range(10)), "small": {"x": 1}},
+            arr=np.zeros(3),
+        )
+
+    def test_shares_untouched_branches(self):
+        data = self.get_data()
+        out = _replace_recursive(data, 'd.small.x', 2, structural_sharing=True)
+        assert out.d["small"]["x"] == 2
+        assert data.d["small"]["x"] == 1
+        assert out.d["big"] is data.d["big"]
+        assert out.b is data.b
+        assert out.a is data.a
+
+    def test_matches_deep_copy_mode(self):
+        data = self.get_data()
+        for location, value in [('a.lat', 5), ('b.1.foo', 'world'), ('arr.2', 4.0)]:
+            shared = _replace_recursive(data, location, value, structural_sharing=True)
+            copied = _replace_recursive(data, location, value)
+            assert rgetattr(shared, location) == rgetattr(copied, location) == value
+        assert data.a.lat == 2 and data.b[1].foo == "hello" and data.arr.sum() == 0
+
+    def test_replace_many(self):
+        data = self.get_data()
+        out = replace_recursive_many(
+            data,
+            {'a.lat': 5, 'b.0.foo': 'world', 'd.small.x': 3, 'arr.1': 1.0},
+            structural_sharing=True,
+        )
+        assert out.a == self.A(5, 3)
+        assert out.b[0].foo == 'world' and out.b[1] is data.b[1]
+        assert out.d == {"big": data.d["big"], "small": {"x": 3}}
+        assert out.arr.tolist() == [0.0, 1.0, 0.0]
+        assert data.a.lat == 2 and data.b[0].foo == 'hello' and data.arr.sum() == 0
+
+
 def test_get_nested_args_from_tuple():
     class A(NamedTuple):
         val: int = 1
@@ -614,6 +861,84 @@ class TestRsetattr:
         assert len(out['foo']) == 4
 
 
+class TestRsetattrMany:
+
+    def test_can_set_many_values(self):
+        @dataclass
+        class A:
+            c: int = 1
+
+        base = {"a": {"b": {"c": 0}}, "x": [0, 1], "y": A()}
+        out = rsetattr_many(base, {"a.b.c": 1, "a.b.d": 2, "x.0": 3, "y.c": 4})
+        assert out is base
+        assert base == {"a": {"b": {"c": 1, "d": 2}}, "x": [3, 1], "y": A(4)}
+
+    def test_matches_rsetattr(self):
+        for values in [
+            {"foo.bar": 1, "foo.roo.0": 2, "foo.ree.zoo.1": 3, "ree": 4},
+            {"c.1.a": 1},
+            {"c.2.a": 1, "c.0.b": 2, "c.2.d.1.e": 3},
+        ]:
+            expected = {}
+            for k, v in values.items():
+                rsetattr(expected, k, v, create_missing_dicts=True)
+            out = rsetattr_many({}, values, create_missing_dicts=True)
+            assert out == expected
+
+    def test_missing_attributes_raise(self):
+        with pytest.raises(AttributeError):
+            rsetattr_many({"foo": {}}, {"foo.bar": 1, "roo.bar": 2})
+
+    def test_traverses_shared_prefix_once(self, mocker):
+        spy = mocker.spy(cls_parsing, "_get_path_keys")
+        rsetattr_many({"a": {"b": {}}}, {"a.b.c": 1, "a.b.d": 2, "a.b.e": 3})
+        assert spy.call_count == 2
+
+
+class TestCompilePath:
+
+    def test_compile_path_is_cached(self):
+        path = compile_path('a.b.3.c')
+        assert compile_path('a.b.3.c') is path
+        assert path.keys == (('a', None), ('b', None), ('3', 3), ('c', None))
+
+    def test_can_get_nested_value(self):
+        @dataclass
+        class A:
+            c: int = 1
+
+        obj = {"a": {"b": [0, 1, 2, A(), np.array([4, 5])]}}
+        assert compile_path('a.b.3.c').get(obj) == 1
+        assert compile_path('a.b.4.1').get(obj) == 5
+        assert compile_path('a.missing').get(obj) is None
+        assert compile_path('a.b.3.missing').get(obj, 'default') == 'default'
+        with pytest.raises(AttributeError):
+            compile_path('a.b.3.missing').get(obj)
+
+    def test_can_set_nested_value(self):
+        path = compile_path('foo.bar.2')
+        obj = {}
+        out = path.set(obj, 'x', create_missing_dicts=True)
+        assert out is obj
+        assert obj == {"foo": {"bar": [None, None, 'x']}}
+        path.set(obj, 'y')
+        assert obj["foo"]["bar"][2] == 'y'
+        with pytest.raises(AttributeError):
+            compile_path('roo.bar').set(obj, 1)
+
+    def test_can_delete_nested_value(self):
+        obj = {"foo": {"bar": [1, 2, 3], "zoo": 1}}
+        compile_path('foo.bar.1').delete(obj)
+        compile_path('foo.zoo').delete(obj)
+        assert obj == {"foo": {"bar": [1, 3]}}
+
+    def test_matches_list_path_functions(self):
+        obj = {"foo": {"bar": [1, 2, 3]}}
+        assert rgetattr(obj, ['foo', 'bar', '1']) == rgetattr(obj, 'foo.bar.1') == 2
+        rdelattr(obj, 'foo.bar.0')
+        assert obj == {"foo": {"bar": [2, 3]}}
+
+
 class TestCheckTypes:
 
     def test_can_check_some_data(self):
@@ -624,4 +949,31 @@ class TestCheckTypes:
         }
 
         config: Union[DemoDataclass, None] = dict_to_cls(config_data, DemoDataclass)
-        check_types(config)
\ No newline at end of file
+        check_types(config)
+
+
+class UnpackPoint(NamedTuple):
+    x: int
+    y: DemoEnum = DemoEnum.DEFAULT
+
+
+class TestUnpack:
+
+    def test_can_unpack_nested_objects(self):
+        data = DemoDataclassSimple(foo=[UnpackPoint(1), (np.array([1, 2]), {"a": 1.5})])
+        assert unpack(data) == {"foo": [{"x": 1, "y": "default"}, ([1, 2], {"a": 1.5})]}
+
+    def test_can_unpack_deep_objects(self):
+        data = 1
+        for _ in range(5000):
+            data = DemoDataclassSimple(foo=data)
+        out = unpack(data)
+        for _ in range(5000):
+            out = out["foo"]
+        assert out == 1
+
+    def test_unpacking_a_cycle_raises(self):
+        data = [1]
+        data.append(data)
+        with pytest.raises(ValueError, match="Cycle detected"):
+            unpack(data)
@@ -8,7 +8,18 @@ import numpy as np
 
 from data_helpers.fill_np_array import fill_np_array_with_cls
 
-from data_helpers.comparisons import are_equal_safe, compare_named_tuples, is_enum, is_iterable, tuples_are_equal
+from data_helpers.comparisons import (
+    are_equal_safe,
+    clear_type_kind_cache,
+    compare_named_tuples,
+    get_type_kind,
+    is_enum,
+    is_iterable,
+    register_equal_safe,
+    tuples_are_equal,
+)
+from data_helpers.meta_type import FieldType
+from tests.helpers import DemoConfig, Uncomparable
 
 
 class DemoEnum(Enum):
@@ -112,6 +123,69 @@ def test_are_equal_safe_namedtuple_nested_numpy():
     assert are_equal_safe(c, d) is False
 
 
+def test_are_equal_safe_dicts_and_dataclasses():
+    a = DemoConfig(values=[1, 2], meta={"x": [np.arange(3)], "y": DemoEnum.DEFAULT})
+    b = DemoConfig(values=[1, 2], meta={"y": DemoEnum.DEFAULT, "x": [np.arange(3)]})
+    assert are_equal_safe(a, b) is True
+    assert are_equal_safe(a, DemoConfig(values=[1, 3], meta=a.meta)) is False
+    assert are_equal_safe({"x": 1}, {"y": 1}) is False
+    assert are_equal_safe({"x": 1}, {"x": 1, "y": 1}) is False
+
+
+def test_are_equal_safe_nested_lists():
+    assert are_equal_safe([[1, 2], [3]], [[1, 2], [3]]) is True
+    assert are_equal_safe([[1, 2], [3]], [[1, 2], [4]]) is False
+    assert are_equal_safe([1, 2], [1, 2.0]) is False
+    assert are_equal_safe((1, [2]), (1, [2])) is True
+    assert are_equal_safe([1], (1,)) is False
+
+
+def test_are_equal_safe_stops_at_first_mismatch():
+    assert are_equal_safe([1, Uncomparable()], [2, Uncomparable()]) is False
+    assert are_equal_safe({"a": 1, "b": Uncomparable()}, {"a": 2, "b": Uncomparable()}) is False
+
+
+def test_are_equal_safe_object_arrays():
+    a = np.array([[1, "a"], [None, [1]]], dtype=object)
+    b = np.array([[1, "a"], [None, [1]]], dtype=object)
+    assert are_equal_safe(a, b) is True
+    b[1, 1] = [2]
+    assert are_equal_safe(a, b) is False
+
+
+def test_are_equal_safe_deep():
+    a, b, c = {"x": 1}, {"x": 1}, {"x": 2}
+    for _ in range(5000):
+        a, b, c = {"k": [a]}, {"k": [b]}, {"k": [c]}
+    assert are_equal_safe(a, b) is True
+    assert are_equal_safe(a, c) is False
+    a, b = [1], [1]
+    for _ in range(5000):
+        a, b = [a], [b]
+    assert are_equal_safe(a, b) is True
+
+
+def test_are_equal_safe_cycles():
+    a = [1]
+    a.append(a)
+    b = [1]
+    b.append(b)
+    with pytest.raises(ValueError):
+        are_equal_safe(a, b)
+
+
+def test_are_equal_safe_custom_types():
+    class Point:
+        def __init__(self, x):
+            self.x = x
+
+    with pytest.raises(TypeError):
+        are_equal_safe(Point(1), Point(1))
+    register_equal_safe(Point, lambda a, b: are_equal_safe(a.x, b.x))
+    assert are_equal_safe([Point(1)], [Point(1)]) is True
+    assert are_equal_safe([Point(1)], [Point([2])]) is False
+
+
 def test_compare_named_tuples():
     class A(NamedTuple):
         foo: int
@@ -156,3 +230,28 @@ class TestIsEnum:
     def test_is_enum(self, value, result):
         assert is_enum(value) == result
 
+
+class TestGetTypeKind:
+
+    def test_classifies_types(self):
+        assert get_type_kind(int).is_base
+        assert get_type_kind(np.float64).is_base_type
+        assert not get_type_kind(np.float64).is_base
+        assert get_type_kind(typing.Optional[int]).is_optional
+        assert get_type_kind(typing.Optional[int]).is_union
+        assert get_type_kind(typing.Union[int, str]).is_union
+        assert not get_type_kind(typing.Union[int, str]).is_optional
+        assert get_type_kind(List[int]).is_iterable
+        assert get_type_kind(DemoEnum).is_enum
+        assert get_type_kind(dict).is_dictionary
+
+    def test_is_cached(self):
+        clear_type_kind_cache()
+        kind = get_type_kind(List[int])
+        assert get_type_kind(List[int]) is kind
+
+    def test_handles_unhashable_annotations(self):
+        t = FieldType(label="foo", type=int)
+        kind = get_type_kind(t)
+        assert kind.is_field_class
+        assert not kind.is_base
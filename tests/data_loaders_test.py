@@ -0,0 +1,97 @@
+import json
+from dataclasses import dataclass
+import io
+
+import pytest
+
+from data_helpers.data_loaders import iter_json_records, iter_json_to_cls
+
+
+@dataclass
+class Record:
+    foo: int = 0
+    bar: str = ""
+
+
+class TestIterJsonRecords:
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 7, 65536])
+    def test_can_iterate_json_array(self, chunk_size):
+        data = [{"foo": i, "bar": f"a,]{i}"} for i in range(10)] + [12345, "x", [1, [2]], None]
+        file_raw = io.StringIO("  \n" + json.dumps(data, indent=2))
+        assert list(iter_json_records(file_raw, chunk_size)) == data
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 65536])
+    def test_can_iterate_ndjson(self, chunk_size):
+        data = [{"foo": i, "bar": str(i)} for i in range(5)]
+        file_raw = io.StringIO("\n".join(json.dumps(d) for d in data) + "\n\n")
+        assert list(iter_json_records(file_raw, chunk_size)) == data
+
+    @pytest.mark.parametrize('chunk_size', [1, 4, 65536])
+    def test_can_iterate_ndjson_of_arrays(self, chunk_size):
+        file_raw = io.StringIO('[1, 2]\n[3]\n\n[{"a": "]\\""}]\n')
+        assert list(iter_json_records(file_raw, chunk_size)) == [[1, 2], [3], [{"a": ']"'}]]
+        assert list(iter_json_records(io.StringIO('[1, 2]\n'), chunk_size)) == [1, 2]
+
+    @pytest.mark.parametrize('chunk_size', [1, 3, 64])
+    def test_can_iterate_large_items(self, chunk_size):
+        data = [{"v": list(range(1000)), "s": "x\\\"[{" * 100}, 1.5, "]" * 300]
+        file_raw = io.StringIO(json.dumps(data, indent=1))
+        assert list(iter_json_records(file_raw, chunk_size)) == data
+
+    def test_numbers_split_across_chunks(self):
+        data = [1.25, -0.5e-3, 1.5e3, 12345, 1E+10, 0.0, True, None]
+        text = "[\n" + ",\n".join(map(json.dumps, data)) + "\n]"
+        for chunk_size in range(1, len(text) + 1):
+            assert list(iter_json_records(io.StringIO(text), chunk_size)) == data
+        text = "[\n" + " " * 65530 + "1.5e3\n]"
+        assert list(iter_json_records(io.StringIO(text))) == [1.5e3]
+        with pytest.raises(ValueError):
+            list(iter_json_records(io.StringIO("[1.5x, 2]"), 2))
+
+    def test_can_stream_single_line_array(self):
+        data = [{"foo": i, "bar": "x" * 100} for i in range(10000)]
+        file_raw = io.StringIO(json.dumps(data))
+        records = iter_json_records(file_raw, 1024, format="array")
+        assert next(records) == data[0]
+        assert file_raw.tell() < 10000
+        assert list(records) == data[1:]
+
+    def test_explicit_format(self):
+        text = '[1, 2]\n[3]\n'
+        assert list(iter_json_records(io.StringIO(text), format="ndjson")) == [[1, 2], [3]]
+        assert list(iter_json_records(io.StringIO("[1, 2]"), format="array")) == [1, 2]
+        with pytest.raises(ValueError):
+            list(iter_json_records(io.StringIO('{"foo": 1}'), format="array"))
+        with pytest.raises(ValueError):
+            list(iter_json_records(io.StringIO(text), format="csv"))
+
+    def test_invalid_item_raises_before_end_of_file(self):
+        tail = ",\n".join(json.dumps({"foo": i}) for i in range(10000))
+        file_raw = io.StringIO('[\n{"foo": 1 "bar": 2},\n' + tail + "]")
+        with pytest.raises(ValueError):
+            list(iter_json_records(file_raw, 64))
+        assert file_raw.tell() < 1000
+
+    def test_empty_inputs(self):
+        assert list(iter_json_records(io.StringIO(""))) == []
+        assert list(iter_json_records(io.StringIO("[]"))) == []
+        assert list(iter_json_records(io.StringIO(" [ ] "))) == []
+
+    def test_invalid_array_raises(self):
+        with pytest.raises(ValueError):
+            list(iter_json_records(io.StringIO('[{"foo": 1} {"foo": 2}]')))
+        with pytest.raises(ValueError):
+            list(iter_json_records(io.StringIO('[{"foo": 1},')))
+
+
+def test_iter_json_to_cls(tmp_path):
+    data = [{"foo": i, "bar": str(i)} for i in range(3)]
+    array_file = tmp_path / "records.json"
+    array_file.write_text(json.dumps(data))
+    ndjson_file = tmp_path / "records.ndjson"
+    ndjson_file.write_text("\n".join(json.dumps(d) for d in data))
+    expected = [Record(i, str(i)) for i in range(3)]
+    assert list(iter_json_to_cls(array_file, Record)) == expected
+    assert list(iter_json_to_cls(ndjson_file, Record)) == expected
+    assert list(iter_json_to_cls(array_file, Record, format="array")) == expected
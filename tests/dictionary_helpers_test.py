@@ -1,17 +1,34 @@
 
-from dataclasses import dataclass
-from typing import Any, NamedTuple
+from dataclasses import dataclass, field
+from functools import reduce
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
 
 from data_helpers.fill_np_array import fill_np_array_with_cls
 from data_helpers.dictionary_helpers import (
+    KEEP,
+    LayeredView,
     ListMergeMethods,
     get_nested_val,
+    compile_query,
+    clear_merge_plan_cache,
+    get_merge_plan,
     merge_dataclasses,
     merge_dictionaries,
+    merge_iterable,
+    merge_many,
+    merge_objects,
     find_key,
     find_all_keys,
+    find_keys,
+    KeyIndex,
     flatten_dict,
+    iter_flat_items,
+    PathIndex,
+    unflatten_dict,
 )
+import pytest
 
 
 def test_get_nested_args_from_dict():
@@ -89,6 +106,110 @@ def test_get_nested_arg_from_list_with_wildcard():
     result = get_nested_val(data, 'dictlist._.foo')
 
 
+class TestCompileQuery:
+    class A(NamedTuple):
+        val: int = 1
+
+    data = {
+        'deepmatrix': [[[1, 2], [3, 4]], [[5, 6], [7, 8]]],
+        'dictlist': [{'foo': 'abc', 'bar': 1}, {'foo': 'def', 'bar': 2}],
+        'arr': list(range(20)),
+        'bar': {'roo': 4, 'ree': 5},
+        'matrix': np.arange(24).reshape(2, 3, 4),
+        'objs': [A(1), A(2)],
+    }
+
+    def test_query_is_cached(self):
+        assert compile_query('arr.1') is compile_query('arr.1')
+
+    def test_matches_get_nested_val(self):
+        for q in ['bar.roo', 'arr.3', 'deepmatrix._.1', 'dictlist._.foo', 'objs._.val']:
+            assert compile_query(q)(self.data) == get_nested_val(self.data, q)
+
+    def test_multiple_wildcards(self):
+        assert compile_query('deepmatrix._._.0')(self.data) == [[1, 3], [5, 7]]
+
+    def test_slices(self):
+        assert compile_query('arr.2:5')(self.data) == [2, 3, 4]
+        assert compile_query('arr.::5')(self.data) == [0, 5, 10, 15]
+        assert compile_query('dictlist.1:.foo')(self.data) == ['def']
+
+    def test_alternatives(self):
+        assert compile_query('bar.roo|ree')(self.data) == [4, 5]
+        assert compile_query('dictlist._.foo|bar')(self.data) == [['abc', 1], ['def', 2]]
+        assert compile_query('bar._')(self.data) == [4, 5]
+
+    def test_vectorised_numpy(self):
+        matrix = self.data['matrix']
+        out = compile_query('matrix._.1')(self.data)
+        assert isinstance(out, np.ndarray)
+        assert np.array_equal(out, matrix[:, 1])
+        assert np.array_equal(compile_query('matrix._.1.2:4')(self.data), matrix[:, 1, 2:4])
+        assert np.array_equal(compile_query('matrix.1._.0')(self.data), matrix[1, :, 0])
+
+
+class TestPathIndex:
+
+    class A(NamedTuple):
+        val: int = 1
+
+    @dataclass
+    class B:
+        foo: Any = None
+
+    def get_data(self):
+        return {
+            'foo': 1,
+            'bar': {'roo': 4, 'ree': {'sow': 10}},
+            'arr': [1, 2, {'x': 3}],
+            'a': self.A(),
+            'b': self.B(foo=[self.A(2)]),
+            'objs': fill_np_array_with_cls(2, self.A),
+            'nums': np.arange(5),
+        }
+
+    def test_can_lookup_all_paths(self):
+        data = self.get_data()
+        index = PathIndex(data)
+        for path in ['foo', 'bar.ree.sow', 'arr.2.x', 'a.val', 'b.foo.0.val', 'objs.1.val']:
+            assert index[path] == get_nested_val(data, path)
+        assert 'bar.ree' in index
+        assert index['bar'] is data['bar']
+        assert index[''] is data
+
+    def test_falls_back_for_unindexed_paths(self):
+        index = PathIndex(self.get_data())
+        assert 'nums.3' not in index
+        assert index['nums.3'] == 3
+        assert index.get('missing.path', 'default') == 'default'
+        with pytest.raises(KeyError):
+            index['bar.missing']
+
+    def test_values_stay_fresh(self):
+        data = self.get_data()
+        index = PathIndex(data)
+        data['bar']['ree']['sow'] = 11
+        assert index['bar.ree.sow'] == 11
+
+    def test_can_invalidate_subtree(self):
+        data = self.get_data()
+        index = PathIndex(data)
+        data['bar']['ree'] = {'new': 5}
+        index.invalidate('bar.ree')
+        assert index['bar.ree.new'] == 5
+        assert 'bar.ree.sow' not in index
+        assert 'bar.roo' in index
+        data['arr'].append(4)
+        index.invalidate()
+        assert index['arr.3'] == 4
+
+    def test_raises_on_cycle(self):
+        data = self.get_data()
+        data['bar']['ree']['self'] = data['bar']
+        with pytest.raises(ValueError, match='Cycle detected at bar.ree.self'):
+            PathIndex(data)
+
+
 class TestMergeDataclasses:
 
     @dataclass
@@ -138,6 +259,59 @@ class TestMergeDataclasses:
         assert c.inner.a == 1
         assert c.inner.b == 2
 
+    @dataclass(frozen=True)
+    class FrozenInner:
+        a: int = None
+        b: Dict[str, int] = None
+
+    @dataclass(frozen=True)
+    class FrozenFoo:
+        foo: Optional[int] = None
+        inner: "TestMergeDataclasses.FrozenInner" = None
+        items: List[int] = None
+        count: int = field(default=None, init=False)
+
+    def test_can_merge_frozen_dataclasses(self):
+        a = self.FrozenFoo(foo=1, inner=self.FrozenInner(a=1, b={"x": 1}), items=[1])
+        b = self.FrozenFoo(inner=self.FrozenInner(b={"y": 2}), items=[2])
+        c = merge_dataclasses(a, b)
+        expected_inner = self.FrozenInner(a=1, b={"x": 1, "y": 2})
+        assert c == self.FrozenFoo(foo=1, inner=expected_inner, items=[2])
+        assert a.inner.b == {"x": 1}
+
+    def test_keeps_fields_not_in_init(self):
+        a = self.FrozenFoo(foo=1)
+        object.__setattr__(a, "count", 3)
+        c = merge_dataclasses(a, self.FrozenFoo(foo=2))
+        assert c.foo == 2
+        assert c.count == 3
+
+    def test_merge_plan_is_cached(self):
+        clear_merge_plan_cache()
+        plan = get_merge_plan(self.FrozenFoo)
+        assert get_merge_plan(self.FrozenFoo) is plan
+        assert plan.frozen
+        assert [(fp.name, fp.kind, fp.init) for fp in plan.fields] == [
+            ("foo", "base", True),
+            ("inner", "other", True),
+            ("items", "iterable", True),
+            ("count", "base", False),
+        ]
+        inner_plan = get_merge_plan(self.FrozenInner)
+        assert [fp.kind for fp in inner_plan.fields] == ["base", "dictionary"]
+
+    def test_values_that_do_not_match_annotation(self):
+        a = self.Foo(foo={"x": 1}, bar=self.Inner(a=1))
+        b = self.Foo(foo={"y": 2}, bar=self.Inner(b=2))
+        c = merge_dataclasses(a, b)
+        assert c.foo == {"x": 1, "y": 2}
+        assert c.bar == self.Inner(a=1, b=2)
+
+    def test_base_field_with_nested_values(self):
+        a = self.FrozenInner(a={"x": 1})
+        b = self.FrozenInner(a={"y": 2})
+        assert merge_dataclasses(a, b).a == {"x": 1, "y": 2}
+
 
 a = {
     "inner": {
@@ -157,8 +331,159 @@ b = {
 }
 
 
+class TestMergeMany:
+
+    @dataclass
+    class Inner:
+        a: int = None
+        b: int = None
+
+    @dataclass
+    class Foo:
+        foo: int = None
+        bar: int = None
+        inner: Any = None
+
+    layers = [
+        {"foo": 1, "inner": {"a": 1, "b": {"c": 1}}, "arr": [{"x": 1}, {"x": 2}]},
+        {"inner": {"a": 2}, "bar": "x"},
+        {"bar": {"roo": 1}, "arr": [{"y": 1}]},
+        {"inner": {"b": {"d": 2}}, "foo": None},
+        {"inner": {"a": 3}},
+    ]
+
+    def test_matches_pairwise_merge(self):
+        for list_method in [ListMergeMethods.REPLACE_ALL, ListMergeMethods.ZIP]:
+            expected = reduce(lambda a, b: merge_objects(a, b, list_method), self.layers)
+            assert merge_many(self.layers, list_method=list_method) == expected
+        assert merge_many(self.layers) == {
+            "foo": 1,
+            "inner": {"a": 3, "b": {"c": 1, "d": 2}},
+            "arr": [{"y": 1}],
+            "bar": {"roo": 1},
+        }
+
+    def test_can_merge_dataclasses(self):
+        layers = [
+            self.Foo(foo=1, inner=self.Inner(a=1)),
+            None,
+            self.Foo(bar=2),
+            self.Foo(foo=3, inner=self.Inner(b=2)),
+        ]
+        assert merge_many(layers) == self.Foo(foo=3, bar=2, inner=self.Inner(a=1, b=2))
+
+    def test_shares_untouched_values(self):
+        out = merge_many(self.layers)
+        assert out["inner"]["b"] is not self.layers[0]["inner"]["b"]
+        assert merge_many([self.layers[0], {"foo": 2}])["inner"] is self.layers[0]["inner"]
+
+    def test_no_layers(self):
+        with pytest.raises(ValueError):
+            merge_many([])
+
+
+class TestLayeredView:
+
+    @dataclass
+    class Inner:
+        a: int = None
+        b: int = None
+
+    @dataclass
+    class Foo:
+        foo: int = None
+        inner: Any = None
+
+    layers = TestMergeMany.layers
+
+    def test_resolves_top_down(self):
+        view = LayeredView(self.layers)
+        assert view["foo"] == 1
+        assert view["bar"]["roo"] == 1
+        assert view.inner.a == 3
+        assert view.inner.b.c == 1
+        assert view.inner.b.d == 2
+        assert view["arr"] == [{"y": 1}]
+
+    def test_nested_views_are_lazy(self):
+        view = LayeredView(self.layers)
+        inner = view["inner"]
+        assert isinstance(inner, LayeredView)
+        assert view["inner"] is inner
+        assert len(inner.layers) == 4
+
+    def test_matches_merge_many(self):
+        for list_method in [ListMergeMethods.REPLACE_ALL, ListMergeMethods.ZIP]:
+            view = LayeredView(self.layers, list_method)
+            expected = merge_many(self.layers, list_method=list_method)
+            assert view.materialise() == expected
+            assert view == expected
+            assert list(view) == list(expected)
+            assert len(view) == len(expected)
+
+    def test_can_view_dataclasses(self):
+        view = LayeredView([
+            self.Foo(foo=1, inner=self.Inner(a=1)),
+            self.Foo(inner=self.Inner(b=2)),
+        ])
+        assert view.foo == 1
+        assert view.inner.a == 1
+        assert view.inner.b == 2
+        assert view.materialise() == self.Foo(foo=1, inner=self.Inner(a=1, b=2))
+
+    def test_missing_keys(self):
+        view = LayeredView([{"foo": None}, {"bar": 1}])
+        assert view["foo"] is None
+        assert "foo" in view
+        assert "roo" not in view
+        assert view.get("roo") is None
+        with pytest.raises(KeyError):
+            view["roo"]
+        with pytest.raises(AttributeError):
+            view.roo
+
+    def test_keys_named_after_methods(self):
+        view = LayeredView([{"keys": 1, "materialise": 2}, {"keys": 3}])
+        assert view["keys"] == 3
+        assert view["materialise"] == 2
+        assert view.materialise() == {"keys": 3, "materialise": 2}
+
+    def test_is_read_only(self):
+        view = LayeredView([{"foo": 1}])
+        with pytest.raises(AttributeError):
+            view.foo = 2
+        with pytest.raises(TypeError):
+            view["foo"] = 2
+
+    def test_invalid_layers(self):
+        with pytest.raises(ValueError):
+            LayeredView([None])
+        with pytest.raises(TypeError):
+            LayeredView([{"foo": 1}, [1, 2]])
+
+
 class TestMergeDictionaries:
 
+    def test_merge_is_copy_on_write(self):
+        a = {"big": {"arr": np.zeros(10), "list": [1, 2]}, "inner": {"x": 1, "y": {"z": 1}}}
+        b = {"inner": {"x": 2}}
+        c = merge_dictionaries(a, b)
+        assert c == {"big": a["big"], "inner": {"x": 2, "y": {"z": 1}}}
+        assert c["big"] is a["big"]
+        assert c["inner"]["y"] is a["inner"]["y"]
+        assert c["inner"] is not a["inner"]
+        assert a["inner"]["x"] == 1
+
+    def test_merge_deep_copy(self):
+        a = {"big": {"list": [1, 2]}, "inner": {"x": 1, "y": {"z": 1}}, "none": {"n": 1}}
+        b = {"inner": {"x": 2}, "none": None}
+        c = merge_dictionaries(a, b, deep_copy=True)
+        assert c == {"big": {"list": [1, 2]}, "inner": {"x": 2, "y": {"z": 1}}, "none": {"n": 1}}
+        assert c["big"] is not a["big"]
+        assert c["big"]["list"] is not a["big"]["list"]
+        assert c["inner"]["y"] is not a["inner"]["y"]
+        assert c["none"] is not a["none"]
+
     def test_can_merge_nested_dictionaries(self):
 
         a = {
@@ -433,6 +758,75 @@ class TestMergeDictionaries:
     #     c = merge_dictionaries(a, b, ListMergeMethods.ZIP)
     #     assert c["Land_Cover"]["fLAI"] == [0.25,0.25,0.25,0.25]
 
+    def test_can_merge_deep_dictionaries(self):
+        a = b = None
+        for i in range(5000):
+            a = {"k": a, "a": i}
+            b = {"k": b, "b": i}
+        c = merge_dictionaries(a, b)
+        for _ in range(4999):
+            assert c["a"] == c["b"]
+            c = c["k"]
+        assert c == {"k": None, "a": 0, "b": 0}
+
+    def test_merging_a_cycle_raises(self):
+        a = {"k": {}}
+        a["k"]["k"] = a
+        b = {"k": {}}
+        b["k"]["k"] = b
+        with pytest.raises(ValueError, match="Cycle detected"):
+            merge_dictionaries(a, b)
+
+
+class TestMergeIterable:
+
+    def test_join_lists(self):
+        a = [{"x": 1}, 2]
+        assert merge_iterable(a, [3], ListMergeMethods.JOIN) == [{"x": 1}, 2, 3]
+        out = merge_iterable(a, [3], ListMergeMethods.JOIN, deep_copy=True)
+        assert out[0] == a[0] and out[0] is not a[0]
+
+    def test_join_arrays(self):
+        out = merge_iterable(np.arange(3), np.arange(2), ListMergeMethods.JOIN)
+        assert isinstance(out, np.ndarray)
+        assert out.tolist() == [0, 1, 2, 0, 1]
+
+    def test_replace_lists(self):
+        a = [1, 2, 3, 4]
+        b = [5, None, KEEP]
+        assert merge_iterable(a, b, ListMergeMethods.REPLACE) == [5, 2, 3, 4]
+        assert merge_iterable([1], [None, 2], ListMergeMethods.REPLACE) == [1, 2]
+
+    def test_replace_arrays_keeps_nan(self):
+        a = np.array([1.0, 2.0, 3.0])
+        b = np.array([np.nan, 5.0, np.nan, 6.0])
+        out = merge_iterable(a, b, ListMergeMethods.REPLACE)
+        assert out.tolist() == [1.0, 5.0, 3.0, 6.0]
+        out = merge_iterable(b[:2], a, ListMergeMethods.REPLACE)
+        assert out.tolist() == [1.0, 2.0, 3.0]
+
+    def test_replace_object_arrays_keeps_sentinel(self):
+        a = np.array(["a", "b", "c"], dtype=object)
+        b = np.array([KEEP, "e", None], dtype=object)
+        out = merge_iterable(a, b, ListMergeMethods.REPLACE)
+        assert out.tolist() == ["a", "e", "c"]
+
+    def test_replace_int_arrays(self):
+        out = merge_iterable(np.arange(3), np.full(3, 7), ListMergeMethods.REPLACE)
+        assert out.tolist() == [7, 7, 7]
+
+    def test_accepts_method_names(self):
+        assert merge_iterable([1], [2], "JOIN") == [1, 2]
+        assert merge_iterable([1], [2]) == [2]
+
+    def test_merge_objects_with_arrays(self):
+        a = {"v": np.array([1.0, 2.0])}
+        b = {"v": np.array([np.nan, 3.0])}
+        out = merge_dictionaries(a, b, ListMergeMethods.REPLACE)
+        assert out["v"].tolist() == [1.0, 3.0]
+        out = merge_dictionaries(a, {"v": np.array([])}, ListMergeMethods.REPLACE)
+        assert out["v"] is a["v"]
+
 
 class TestFindKey:
 
@@ -1093,6 +1487,55 @@ class TestFindAllKeys:
         assert k_out[2] == "bar.1.foo"
         assert k_out[3] == "bar.1.ree.foo"
 
+    def test_find_all_keys_deep(self):
+        d = {"foo": 1}
+        for _ in range(5000):
+            d = {"bar": d}
+        assert find_all_keys(d, "foo") == [".".join(["bar"] * 5000 + ["foo"])]
+
+    def test_find_all_keys_cycle_raises(self):
+        d = {"bar": {}}
+        d["bar"]["bar"] = d
+        with pytest.raises(ValueError, match=r"Cycle detected at bar(\.bar)+$"):
+            find_all_keys(d, "foo")
+
+
+class TestFindKeys:
+    data = {
+        "bar": {
+            "foo": {"foo": 1, "sow": 2},
+            "roo": 3,
+            "ree": [{"foo": 4}, [{"foo": 5}], 6],
+        },
+        "sow": 7,
+    }
+
+    def test_finds_all_keys_in_one_pass(self):
+        result = find_keys(self.data, {"foo", "sow", "missing"})
+        assert result == {
+            "foo": ["bar.foo", "bar.ree.0.foo"],
+            "sow": ["bar.foo.sow", "sow"],
+            "missing": [],
+        }
+        for k in ["foo", "sow", "missing"]:
+            assert result[k] == find_all_keys(self.data, k)
+
+    def test_key_index(self):
+        index = KeyIndex(self.data)
+        assert "roo" in index
+        assert "missing" not in index
+        for k in ["foo", "sow", "roo", "ree", "missing"]:
+            assert index.find_all(k) == find_all_keys(self.data, k)
+            assert index.find(k) == find_key(self.data, k)
+
+    def test_cycle_raises(self):
+        d = {"a": 1}
+        d["b"] = d
+        with pytest.raises(ValueError, match=r"Cycle detected at b(\.b)+$"):
+            find_keys(d, ["z"])
+        with pytest.raises(ValueError, match="Cycle detected"):
+            KeyIndex(d)
+
 
 class TestFlattenDict:
     def test_flatten_dict(self):
@@ -1139,4 +1582,47 @@ class TestFlattenDict:
             'matrix.1.0': 4,
             'matrix.1.1': 5,
             'matrix.1.2': 6,
-        }
\ No newline at end of file
+        }
+
+    def test_flatten_dict_nested_list_in_dict(self):
+        data = {'foo': {'arr': [1, {'bar': 2}]}}
+        assert flatten_dict(data) == {'foo.arr.0': 1, 'foo.arr.1.bar': 2}
+        assert flatten_dict({'arr': [1]}, parent_key='p') == {'p.arr.0': 1}
+
+    def test_flatten_dict_deep(self):
+        data = leaf = {}
+        for _ in range(5000):
+            leaf['k'] = {}
+            leaf = leaf['k']
+        leaf['k'] = 1
+        assert flatten_dict(data) == {".".join(['k'] * 5001): 1}
+
+
+class TestIterFlatItems:
+    def test_yields_leaves_in_order(self):
+        data = {'foo': 1, 'bar': {'roo': [4, 5], 'ree': {}}, 'sow': 10}
+        result = iter_flat_items(data)
+        assert not isinstance(result, dict)
+        assert list(result) == [('foo', 1), ('bar.roo.0', 4), ('bar.roo.1', 5), ('sow', 10)]
+
+    def test_custom_separator(self):
+        assert list(iter_flat_items({'a': {'b': 1}}, sep='/')) == [('a/b', 1)]
+
+
+class TestUnflattenDict:
+    def test_is_inverse_of_flatten_dict(self):
+        data = {
+            'foo': 1,
+            'bar': {'roo': 4, 'ree': {'sow': 10}},
+            'matrix': [[1, 2, 3], [4, {'x': 5}]],
+        }
+        assert unflatten_dict(flatten_dict(data)) == data
+
+    def test_pads_missing_list_items(self):
+        assert unflatten_dict({'arr.2': 1}) == {'arr': [None, None, 1]}
+
+    def test_conflicting_keys_raise(self):
+        with pytest.raises(ValueError):
+            unflatten_dict({'a': 1, 'a.b': 2})
+        with pytest.raises(ValueError):
+            unflatten_dict({'a.b': 2, 'a': 1})
@@ -1,4 +1,18 @@
-from data_helpers.diff import diff_dicts
+import numpy as np
+import pytest
+
+from data_helpers.diff import (
+    Change,
+    ChangeOp,
+    SubtreeHashes,
+    apply_patch,
+    diff,
+    diff_dicts,
+    has_differences,
+    iter_changes,
+    iter_diff,
+)
+from tests.helpers import DemoConfig, Uncomparable
 
 
 class TestCompareDicts:
@@ -27,7 +41,6 @@ class TestCompareDicts:
         diff = diff_dicts('fieldex', ain, bin)
         assert diff == []
 
-
     def test_should_handle_similar_floats(self):
         ain = {
             "foo": "bar",
@@ -87,3 +100,212 @@ class TestCompareDicts:
         }
         diff = diff_dicts('fieldex', ain, bin)
         assert diff == ['fieldex.hello.0: world -> earth']
+
+    def test_should_return_container_type_changes(self):
+        diff = diff_dicts('f', {"a": {}}, {"a": []})
+        assert diff == ['f.a: {} -> []']
+
+    def test_should_return_differences_in_key_order(self):
+        diff = diff_dicts('f', {"b": 1, "a": 1}, {"c": 1, "a": 2, "b": 1})
+        assert diff == ['f.a: 1 -> 2', 'f.c: None -> 1']
+
+    def test_should_return_differences_deep(self):
+        a = {"foo": 1}
+        b = {"foo": 2}
+        for _ in range(5000):
+            a = {"bar": a}
+            b = {"bar": b}
+        diff = diff_dicts('f', a, b)
+        assert diff == ['f.' + 'bar.' * 5000 + 'foo: 1 -> 2']
+
+    def test_should_return_differences_deep_with_colliding_hashes(self):
+        # Too deep for == so the subtrees are compared by their hashes
+        a = {"foo": -1}
+        b = {"foo": -2}
+        for _ in range(2000):
+            a = {"bar": a}
+            b = {"bar": b}
+        diff = diff_dicts('f', a, b)
+        assert diff == ['f.' + 'bar.' * 2000 + 'foo: -1 -> -2']
+
+    def test_should_return_differences_with_arrays(self):
+        a = {"foo": [1.0, 2.0], "bar": {"x": np.array([1, 2])}}
+        b = {"foo": [1.0, 3.0], "bar": {"x": np.array([1, 2])}}
+        assert diff_dicts('f', a, b) == ['f.foo.1: 2.0 -> 3.0']
+
+    def test_should_return_list_length_changes(self):
+        diff = diff_dicts('f', {"a": [1, 2, 3]}, {"a": [1, 4], "b": [None]})
+        assert diff == ['f.a.1: 2 -> 4', 'f.a.2: 3 -> None', 'f.b: None -> [None]']
+
+    def test_can_limit_changes(self):
+        a = {f"k{i}": i for i in range(10)}
+        b = {f"k{i}": -i for i in range(10)}
+        assert diff_dicts('f', a, b, max_changes=2) == ['f.k1: 1 -> -1', 'f.k2: 2 -> -2']
+        assert diff_dicts('f', 1, b, max_changes=0) == []
+        assert len(diff('f', a, b, max_changes=100)) == 9
+
+
+class TestDiffArrays:
+
+    def test_should_summarise_changed_values(self):
+        a = np.arange(100, dtype=np.float64)
+        b = a.copy()
+        b[[3, 50]] = [4.0, 75.0]
+        assert diff('f', {"arr": a}, {"arr": b}) == [
+            'f.arr: 2 of 100 values changed at [3, 50], max abs error 25, max rel error 0.333333'
+        ]
+
+    def test_should_list_first_indices(self):
+        changes = diff('f', np.zeros((3, 3)), np.ones((3, 3)))
+        assert changes == [
+            'f: 9 of 9 values changed at [(0, 0), (0, 1), (0, 2), (1, 0), (1, 1), ...], '
+            'max abs error 1, max rel error 1'
+        ]
+
+    def test_should_use_tolerances(self):
+        a = np.array([1.0, 100.0, np.nan])
+        b = np.array([1.001, 100.05, np.nan])
+        assert diff('f', a, b) == []
+        assert diff('f', a, b, rtol=0, atol=0.01) == [
+            'f: 1 of 3 values changed at [1], max abs error 0.05, max rel error 0.00049975'
+        ]
+
+    def test_should_return_shape_and_dtype_changes(self):
+        assert diff('f', np.zeros(3), np.zeros(4)) == ['f: shape (3,) -> (4,)']
+        assert diff('f', np.array(1.0), np.array(2)) == ['f: dtype float64 -> int64, 1.0 -> 2']
+        assert diff('f', np.zeros(3), np.zeros(3, dtype=np.int64)) == [
+            'f: dtype float64 -> int64'
+        ]
+        assert diff('f', np.array(["a", "b"]), np.array(["a", "c"])) == [
+            'f: 1 of 2 values changed at [1]'
+        ]
+
+
+class TestSubtreeHashes:
+
+    def test_same_content_has_same_hash(self):
+        hashes = SubtreeHashes()
+        a = {"a": [1, {"b": 2}], "c": np.array([1, 2])}
+        b = {"c": np.array([1, 2]), "a": [1, {"b": 2}]}
+        assert hashes.get(a) == hashes.get(b)
+        assert hashes.get(a) != hashes.get({"a": [1, {"b": 3}], "c": np.array([1, 2])})
+        assert hashes.get([1, 2]) != hashes.get((1, 2))
+
+    def test_colliding_builtin_hashes_differ(self):
+        hashes = SubtreeHashes()
+        assert hash(-1) == hash(-2) and hash(2 ** 61 - 1) == hash(0)
+        assert hashes.get({"x": -1}) != hashes.get({"x": -2})
+        assert hashes.get([{"x": []}, 2 ** 61 - 1]) != hashes.get([{"x": []}, 0])
+        nan = float("nan")
+        assert hashes.get([nan]) == hashes.get([nan])
+        assert hashes.get([nan]) != hashes.get([float("nan")])
+
+    def test_diff_with_colliding_builtin_hashes(self):
+        for x, y in [(-1, -2), (2 ** 61 - 1, 0)]:
+            changes = diff('f', {"cfg": {"x": x}}, {"cfg": {"x": y}}, use_hashes=True)
+            assert changes == [f'f.cfg.x: {x} -> {y}']
+
+    def test_memoises_containers(self):
+        baseline = {"a": {"b": [1, 2]}, "c": [{"d": []}]}
+        hashes = SubtreeHashes(baseline)
+        assert len(hashes) == 6
+        hashes.get(baseline)
+        assert len(hashes) == 6
+        hashes.clear()
+        assert len(hashes) == 0
+
+    def test_diff_with_hashes(self):
+        a = {"foo": {"bar": [1, 2, {"x": 1.0}]}, "roo": {"ree": 1}}
+        b = {"foo": {"bar": [1, 2, {"x": 2.0}]}, "roo": {"ree": 1}}
+        expected = ['f.foo.bar.2.x: 1.0 -> 2.0']
+        assert diff('f', a, b, use_hashes=True) == expected
+        baseline = SubtreeHashes(a)
+        assert diff('f', a, b, baseline_hashes=baseline) == expected
+        assert diff_dicts('f', a, a, baseline_hashes=baseline) == []
+
+
+class TestIterChanges:
+
+    def test_yields_change_records(self):
+        a = {"a": 1, "b": [1, 2], "c": {"d": 1}}
+        b = {"a": 2, "b": [1, 2, 3], "e": 1}
+        assert list(iter_changes(a, b)) == [
+            Change(("a",), ChangeOp.CHANGE, 1, 2),
+            Change(("b", 2), ChangeOp.ADD, None, 3),
+            Change(("c",), ChangeOp.REMOVE, {"d": 1}, None),
+            Change(("e",), ChangeOp.ADD, None, 1),
+        ]
+
+    def test_none_is_the_same_as_missing(self):
+        assert list(iter_changes({"a": None}, {"b": None})) == []
+
+    def test_can_format_changes(self):
+        assert Change(("a", 0), ChangeOp.ADD, None, 3).format() == "a.0: None -> 3"
+        assert Change(("a",), ChangeOp.CHANGE, 1, 2).format("f") == "f.a: 1 -> 2"
+        change = Change((), ChangeOp.CHANGE, np.zeros(2), np.array([0.0, 1.0]))
+        assert change.format("f") == (
+            "f: 1 of 2 values changed at [1], max abs error 1, max rel error 1"
+        )
+
+
+class TestIterDiff:
+
+    def test_stops_at_first_difference(self):
+        a = {"a": 1, "b": Uncomparable()}
+        b = {"a": 2, "b": Uncomparable()}
+        changes = iter_diff('f', a, b)
+        assert next(changes) == 'f.a: 1 -> 2'
+        assert has_differences(a, b)
+        with pytest.raises(AssertionError):
+            next(changes)
+
+    def test_has_differences(self):
+        assert not has_differences({"a": [1, {"b": 1.0}]}, {"a": [1, {"b": 1.0001}]})
+        assert has_differences({"a": [1, {"b": 1.0}]}, {"a": [1, {"b": 1.0001}]}, rtol=0)
+        assert has_differences({"a": [1]}, {"a": [1, 2]})
+
+    def test_has_differences_deep(self):
+        a = {"foo": -1}
+        b = {"foo": -2}
+        c = {"foo": -1}
+        for _ in range(2000):
+            a = {"bar": a}
+            b = {"bar": b}
+            c = {"bar": c}
+        assert has_differences(a, b)
+        assert not has_differences(a, c)
+
+
+class TestApplyPatch:
+
+    def test_can_patch_dicts_and_lists(self):
+        a = {"a": 1, "b": [1, 2, 3], "c": {"d": 1}, "f": (1, [2])}
+        b = {"a": 2, "b": [4], "e": {"g": 1}, "f": (1, [3])}
+        patched = apply_patch(a, iter_changes(a, b))
+        assert patched == b
+        assert a == {"a": 1, "b": [1, 2, 3], "c": {"d": 1}, "f": (1, [2])}
+
+    def test_shares_unchanged_values(self):
+        a = {"a": {"b": 1}, "c": {"d": [1]}}
+        patched = apply_patch(a, [Change(("c", "d", 1), ChangeOp.ADD, None, 2)])
+        assert patched == {"a": {"b": 1}, "c": {"d": [1, 2]}}
+        assert patched["a"] is a["a"]
+
+    def test_can_patch_frozen_dataclasses(self):
+        a = {"settings": DemoConfig("a", [1, 2])}
+        b = {"settings": DemoConfig("b", [1])}
+        changes = list(iter_changes(a, b))
+        assert changes == [
+            Change(("settings", "name"), ChangeOp.CHANGE, "a", "b"),
+            Change(("settings", "values", 1), ChangeOp.REMOVE, 2, None),
+        ]
+        assert apply_patch(a, changes) == b
+        assert a == {"settings": DemoConfig("a", [1, 2])}
+
+    def test_can_patch_root(self):
+        assert apply_patch(1, iter_changes(1, 2)) == 2
+
+    def test_cannot_resize_arrays(self):
+        a = np.array([1, 2], dtype=object)
+        with pytest.raises(TypeError):
+            apply_patch(a, iter_changes(a, np.array([1, 2, 3], dtype=object)))
@@ -0,0 +1,15 @@
+"""Fixtures shared by the tests."""
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass(frozen=True)
+class DemoConfig:
+    name: str = "a"
+    values: List[int] = field(default_factory=list)
+    meta: dict = field(default_factory=dict)
+
+
+class Uncomparable:
+    def __eq__(self, other):
+        raise AssertionError("Should not be compared")
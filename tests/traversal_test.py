@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+import pytest
+
+from data_helpers.traversal import (
+    CYCLE_CHECK_DEPTH,
+    fold,
+    iter_children,
+    link_path,
+    unlink_path,
+    walk,
+)
+
+
+class Point(NamedTuple):
+    x: int
+    y: int
+
+
+@dataclass
+class Box:
+    point: Point
+    tags: tuple
+
+
+def make_chain(depth: int, leaf=1) -> dict:
+    d = leaf
+    for _ in range(depth):
+        d = {"k": d}
+    return d
+
+
+class TestIterChildren:
+
+    def test_containers(self):
+        assert list(iter_children({"a": 1})) == [("a", 1)]
+        assert list(iter_children([1, 2])) == [(0, 1), (1, 2)]
+        assert list(iter_children((1,))) == [(0, 1)]
+        assert list(iter_children(Point(1, 2))) == [("x", 1), ("y", 2)]
+        assert list(iter_children(Box(Point(1, 2), ()))) == [("point", Point(1, 2)), ("tags", ())]
+        assert len(list(iter_children(np.zeros((2, 3))))) == 2
+
+    def test_leaves(self):
+        assert iter_children(1) is None
+        assert iter_children("abc") is None
+        assert iter_children(np.zeros(3)) is None
+        assert iter_children(Box) is None
+
+
+class TestWalk:
+
+    def test_walks_in_pre_order(self):
+        data = {"a": {"b": 1, "c": [2, 3]}, "d": 4}
+        assert [(path, is_leaf) for path, _, is_leaf in walk(data)] == [
+            ((), False),
+            (("a",), False),
+            (("a", "b"), True),
+            (("a", "c"), False),
+            (("a", "c", 0), True),
+            (("a", "c", 1), True),
+            (("d",), True),
+        ]
+
+    def test_can_prune(self):
+        data = {"a": {"b": 1}, "c": {"d": 2}}
+        paths = [path for path, _, _ in walk(data, prune=lambda path, node: path == ("a",))]
+        assert paths == [(), ("a",), ("c",), ("c", "d")]
+
+    def test_custom_children(self):
+        def children(node):
+            return ((i, i) for i in range(node)) if node > 1 else None
+
+        assert [node for _, node, _ in walk(4, children)] == [4, 0, 1, 2, 0, 1, 3, 0, 1, 2, 0, 1]
+
+    def test_handles_deep_documents(self):
+        depth = 10000
+        nodes = list(walk(make_chain(depth), root_path=None, extend_path=link_path))
+        path, node, is_leaf = nodes[-1]
+        assert len(nodes) == depth + 1
+        assert is_leaf and node == 1
+        assert unlink_path(path) == ("k",) * depth
+
+    def test_detects_cycles(self):
+        data = {"a": [1]}
+        data["a"].append(data)
+        with pytest.raises(ValueError, match="Cycle detected"):
+            list(walk(data, detect_cycles=True))
+        with pytest.raises(ValueError, match=r"Cycle detected at a\.1(\.a\.1)+$"):
+            list(walk(data, detect_cycles=True, root_path=None, extend_path=link_path))
+
+    def test_shared_values_are_not_cycles(self):
+        shared = make_chain(CYCLE_CHECK_DEPTH * 2)
+        data = {"a": shared, "b": shared}
+        assert len(list(walk(data, detect_cycles=True))) == 2 * (CYCLE_CHECK_DEPTH * 2 + 1) + 1
+
+
+class TestFold:
+
+    def test_builds_from_leaves(self):
+        data = {"a": [1, 2], "b": {"c": 3}}
+        out = fold(
+            data,
+            iter_children,
+            lambda v: v * 10,
+            lambda node, items: {k: v for k, v in items},
+        )
+        assert out == {"a": {0: 10, 1: 20}, "b": {"c": 30}}
+
+    def test_leaf_root(self):
+        assert fold(1, iter_children, lambda v: v + 1, None) == 2
+
+    def test_handles_deep_documents(self):
+        depth = 10000
+        total = fold(
+            make_chain(depth), iter_children, lambda v: v, lambda node, items: items[0][1] + 1
+        )
+        assert total == depth + 1
+
+    def test_detects_cycles(self):
+        data = {"a": {}}
+        data["a"]["b"] = data
+        with pytest.raises(ValueError, match="Cycle detected at a.b"):
+            fold(data, iter_children, lambda v: v, lambda n, items: dict(items), detect_cycles=True)